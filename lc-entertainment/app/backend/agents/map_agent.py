@@ -4,7 +4,7 @@
 import logging
 from langchain.agents import create_agent
 from ..llm import llm
-from ..tools import amap_poi_search, amap_route_planner
+from ..tools import amap_poi_search, amap_route_planner, amap_route_plan_many
 
 logger = logging.getLogger(__name__)
 
@@ -13,16 +13,18 @@ MAP_SYSTEM_PROMPT = (
     "工作流程:\n"
     "1. 分析用户意图 (搜索POI还是规划路径)。\n"
     "2. 若需要地点经纬度，必须先调用 amap_poi_search。\n"
-    "3. 获得经纬度后，如用户需要路径，调用 amap_route_planner。\n"
+    "3. 获得经纬度后，如用户需要路径，调用 amap_route_planner；多段行程或多种出行方式对比时，调用 amap_route_plan_many 一次完成。\n"
     "4. 最终基于工具返回数据与常识给出行程建议(里程/时长/附近推荐)。\n"
 )
 
+MAP_TOOLS = [amap_poi_search, amap_route_planner, amap_route_plan_many]
+
 def create_map_agent():
     """创建地图 Agent"""
     logger.info("创建地图 Agent...")
     
-    tools = [amap_poi_search, amap_route_planner]
-    logger.info(f"已加载 {len(tools)} 个工具: {[t.name for t in tools]}")
+    tools = MAP_TOOLS
+    logger.info("已加载 %s 个工具: %s", len(tools), [t.name for t in tools])
     
     agent = create_agent(
         model=llm,
@@ -2,8 +2,8 @@
 音乐 Agent - 负责多平台音乐搜索和播放控制 (QQ音乐、网易云音乐)
 """
 import logging
-import os
 from langchain.agents import create_agent
+from ..config import MUSIC_PLATFORM
 from ..llm import llm
 from ..tools import (
     qq_music_search_cdp, qq_music_play_cdp,
@@ -33,27 +33,32 @@ MUSIC_SYSTEM_PROMPT = (
     "注意: 这些工具通过 Chrome DevTools Protocol 直接控制浏览器执行实际操作。"
 )
 
+# 平台 -> (工具列表, 平台名称)
+_MUSIC_PLATFORMS = {
+    "qq": ([qq_music_search_cdp, qq_music_play_cdp], "QQ音乐"),
+    "netease": ([netease_music_search_cdp, netease_music_play_cdp], "网易云音乐"),
+}
+
+def get_music_tools():
+    """根据 MUSIC_PLATFORM 配置返回 (工具列表, 平台名称)"""
+    # 音乐平台配置在 config 导入时读取一次，默认使用QQ音乐
+    music_platform = MUSIC_PLATFORM.lower()
+
+    if music_platform not in _MUSIC_PLATFORMS:
+        logger.warning("未知的MUSIC_PLATFORM: %s，使用默认平台QQ音乐", music_platform)
+        music_platform = "qq"
+
+    tools, platform_name = _MUSIC_PLATFORMS[music_platform]
+    return list(tools), platform_name
+
 def create_music_agent():
     """创建音乐 Agent"""
     logger.info("创建音乐 Agent...")
 
-    # 从环境变量获取音乐平台配置，默认使用QQ音乐
-    music_platform = os.getenv("MUSIC_PLATFORM", "qq").lower()
-    
-    if music_platform == "qq":
-        tools = [qq_music_search_cdp, qq_music_play_cdp]
-        platform_name = "QQ音乐"
-    elif music_platform == "netease":
-        tools = [netease_music_search_cdp, netease_music_play_cdp]
-        platform_name = "网易云音乐"
-    else:
-        # 默认使用QQ音乐
-        tools = [qq_music_search_cdp, qq_music_play_cdp]
-        platform_name = "QQ音乐"
-        logger.warning(f"未知的MUSIC_PLATFORM: {music_platform}，使用默认平台QQ音乐")
+    tools, platform_name = get_music_tools()
     
-    logger.info(f"已配置音乐平台: {platform_name}")
-    logger.info(f"已加载 {len(tools)} 个工具: {[t.name for t in tools]}")
+    logger.info("已配置音乐平台: %s", platform_name)
+    logger.info("已加载 %s 个工具: %s", len(tools), [t.name for t in tools])
 
     agent = create_agent(
         model=llm,
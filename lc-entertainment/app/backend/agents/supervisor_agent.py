@@ -1,19 +1,104 @@
 """
 主路由 Agent (Supervisor) - 负责任务分析、分发和结果协调
 """
+import asyncio
+import collections
+import functools
+import itertools
 import logging
-from typing import Literal, Dict, Any, List
+import re
+import threading
+import time
+from typing import Literal, Dict, Any, List, Optional, AsyncIterator, Callable, Iterator
+from langchain.agents import create_agent
 from langchain_core.messages import HumanMessage
-from ..llm import llm
+from ..config import INTENT_CACHE_MODEL, INTENT_CACHE_THRESHOLD, RESPONSE_CACHE_THRESHOLD, RESPONSE_CACHE_TTL
+from ..llm import classifier_llm, llm
+
+# 句向量模型为可选依赖，未安装时意图缓存只做精确匹配
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except Exception:  # pragma: no cover - environment may not have sentence-transformers
+    SentenceTransformer = None
 
 logger = logging.getLogger(__name__)
 
 # Agent类型定义
 AgentType = Literal["map", "music", "general"]
 
+# 意图关键词：只命中一类时直接确定Agent，跳过LLM分类
+# 不用单字"去"：会误中"去年"、"过去"等，只保留明确表示前往的词组
+MAP_KWS = ("导航", "路线", "路径", "去往", "带我去", "开车去", "怎么走", "附近")
+# 平台名本身即表明是音乐任务（"QQ音乐" 已被 "音乐" 覆盖）
+MUSIC_KWS = ("播放", "歌", "音乐", "听", "来首", "网易云", "酷狗", "酷我")
+# 两类关键词合成一个带命名分组的正则，一次扫描即可得到命中的类别
+_INTENT_RE = re.compile(
+    "(?P<map>" + "|".join(map(re.escape, MAP_KWS)) + ")"
+    "|(?P<music>" + "|".join(map(re.escape, MUSIC_KWS)) + ")"
+)
+
+# 意图分类提示词：静态部分放在前面，只有结尾的用户输入每次变化
+CLASSIFICATION_PROMPT_PREFIX = """你是一个任务分类助手。根据用户的输入，判断应该使用哪个专业Agent来处理。
+
+可用的Agent类型：
+- map: 地图相关任务，包括POI搜索、路径规划、地点查询、导航等
+- music: 音乐相关任务，包括搜索歌曲、播放音乐、音乐平台操作等
+- general: 其他一般性对话或无法分类的任务
+
+请只返回Agent类型（map/music/general），不要返回其他内容。
+如果任务同时包含地图和音乐需求，返回用英文逗号分隔的多个类型，例如: map,music
+
+"""
+
+CLASSIFICATION_PROMPT_SUFFIX = "用户输入: {user_input}\n"
+
+ROUTING_SYSTEM_PROMPT = (
+    "你是车载智能助理，可以直接调用地图和音乐工具完成用户的请求。\n\n"
+    "地图任务 (POI搜索、路径规划、导航):\n"
+    "1. 若需要地点经纬度，必须先调用 amap_poi_search。\n"
+    "2. 获得经纬度后，如用户需要路径，调用 amap_route_planner；多段行程或多种出行方式对比时，调用 amap_route_plan_many 一次完成。\n"
+    "3. 基于工具返回数据给出行程建议(里程/时长/附近推荐)。\n\n"
+    "音乐任务 (搜索歌曲、播放音乐):\n"
+    "1. 理解用户给出的歌曲/歌手名。\n"
+    "2. 先调用音乐搜索工具获取定位信息，再调用播放工具播放。\n"
+    "3. 回复用户播放状态。\n\n"
+    "如果请求同时包含地图和音乐需求，依次完成全部需求。\n"
+    "如果请求与地图和音乐都无关，不要调用任何工具，直接回答用户。"
+)
+
+@functools.lru_cache(maxsize=1024)
+def _match_keywords(user_input: str) -> Optional[AgentType]:
+    """用预编译的关键词正则判断意图，重复输入直接命中缓存"""
+    matched = None
+    for m in _INTENT_RE.finditer(user_input):
+        if matched is None:
+            matched = m.lastgroup
+        elif m.lastgroup != matched:
+            return None  # 两类都命中，交给模型判断
+    return matched
+
+
+# 同步接口共用的后台事件循环
+# 异步HTTP客户端的连接池绑定在事件循环上，每次 asyncio.run 新建循环会让连接无法复用
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _run_sync(coro):
+    """在共享的后台事件循环中运行协程并阻塞等待结果"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="supervisor-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _loop).result()
+
 
 class TaskResult:
     """任务执行结果的标准化包装"""
+    __slots__ = ("success", "agent_type", "content", "metadata", "error")
+
     def __init__(
         self,
         success: bool,
@@ -38,6 +123,111 @@ class TaskResult:
         }
 
 
+_embedder_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def _load_embedder_once(model_name: str):
+    logger.info("加载语义缓存句向量模型: %s", model_name)
+    return SentenceTransformer(model_name)
+
+
+def _load_embedder(model_name: str):
+    """加载句向量模型，意图缓存和回复缓存共用同一个模型实例；加锁避免并发首次调用重复加载"""
+    with _embedder_lock:
+        return _load_embedder_once(model_name)
+
+
+class SemanticCache:
+    """
+    基于句向量的语义缓存
+
+    相似的输入（"播放周杰伦" / "放一首周杰伦的歌"）通过句向量余弦相似度命中缓存，
+    用一次本地向量比较代替一次LLM调用。未安装 sentence-transformers 时退化为
+    规范化文本的精确匹配。ttl 为 None 时条目不过期。
+
+    模型加载和编码在线程池中执行（aget），不阻塞共享的事件循环；
+    aget 返回的句向量可直接传给 put，未命中时不必重复编码。
+    """
+
+    def __init__(self, model_name: str, threshold: float = 0.92, max_size: int = 256, ttl: Optional[float] = None):
+        self.model_name = model_name
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+        self._exact: Dict[str, tuple] = {}
+        self._vectors: List[Any] = []
+        self._entries: List[tuple] = []
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return "".join(text.split()).lower()
+
+    @property
+    def semantic(self) -> bool:
+        """是否启用句向量匹配"""
+        return SentenceTransformer is not None and bool(self.model_name)
+
+    def _embed(self, text: str):
+        if not self.semantic:
+            return None
+        return _load_embedder(self.model_name).encode(text, normalize_embeddings=True)
+
+    def _alive(self, entry: tuple) -> bool:
+        return entry[1] is None or entry[1] > time.monotonic()
+
+    def _get_exact(self, text: str) -> Optional[Any]:
+        entry = self._exact.get(self._normalize(text))
+        if entry is not None and self._alive(entry):
+            return entry[0]
+        return None
+
+    def _get_similar(self, vector) -> Optional[Any]:
+        if vector is None or not self._vectors:
+            return None
+        # 向量已归一化，点积即余弦相似度
+        scores = np.dot(np.stack(self._vectors), vector)
+        best = int(np.argmax(scores))
+        if scores[best] > self.threshold and self._alive(self._entries[best]):
+            return self._entries[best][0]
+        return None
+
+    async def aget(self, text: str) -> tuple:
+        """
+        异步查找缓存，句向量在线程池中计算
+
+        Returns:
+            (缓存值或 None, 输入的句向量或 None)；精确命中时不计算句向量
+        """
+        cached = self._get_exact(text)
+        if cached is not None:
+            return cached, None
+        if not self.semantic:
+            return None, None
+        vector = await asyncio.to_thread(self._embed, text)
+        return self._get_similar(vector), vector
+
+    def put(self, text: str, value: Any, vector=None):
+        """
+        写入缓存，超出容量时淘汰最早的条目
+
+        vector 为 aget 已算出的句向量；为 None 时只写入精确匹配，不在调用方线程中编码
+        """
+        entry = (value, None if self.ttl is None else time.monotonic() + self.ttl)
+        key = self._normalize(text)
+        self._exact.pop(key, None)
+        if len(self._exact) >= self.max_size:
+            self._exact.pop(next(iter(self._exact)))
+        self._exact[key] = entry
+
+        if vector is not None:
+            if len(self._vectors) >= self.max_size:
+                self._vectors.pop(0)
+                self._entries.pop(0)
+            self._vectors.append(vector)
+            self._entries.append(entry)
+
+
 class SupervisorAgent:
     """
     主路由Agent，负责：
@@ -49,24 +239,59 @@ class SupervisorAgent:
 
     def __init__(self):
         self.logger = logging.getLogger(__name__ + ".SupervisorAgent")
-        self.task_history: List[Dict[str, Any]] = []
+        self.task_history: collections.deque = collections.deque(maxlen=100)
 
-        # 创建子Agent实例
+        # 统计计数器，随历史记录增量维护
+        self._success_count = 0
+        self._time_sum = 0.0
+        self._agent_usage = collections.Counter()
+        self._intent_cache = SemanticCache(INTENT_CACHE_MODEL, INTENT_CACHE_THRESHOLD)
+        # 一般对话的回复缓存；地图/音乐任务有操作副作用（导航、播放），不缓存
+        self._response_cache = SemanticCache(INTENT_CACHE_MODEL, RESPONSE_CACHE_THRESHOLD, ttl=RESPONSE_CACHE_TTL)
+
+        # 登记子Agent
         self._init_sub_agents()
 
         self.logger.info("SupervisorAgent 初始化完成")
 
     def _init_sub_agents(self):
-        """初始化所有子Agent"""
-        from .map_agent import create_map_agent
-        from .music_agent import create_music_agent
+        """登记子Agent工厂，子Agent在首次使用时才创建"""
+        from .map_agent import create_map_agent, MAP_TOOLS
+        from .music_agent import create_music_agent, get_music_tools
+
+        music_tools, _ = get_music_tools()
+        self.tool_owners = {t.name: "map" for t in MAP_TOOLS}
+        self.tool_owners.update({t.name: "music" for t in music_tools})
+
+        # 统一路由Agent：持有全部子Agent的工具，由模型通过工具选择完成路由，
+        # 省去单独的意图分类LLM调用
+        def create_router_agent():
+            return create_agent(
+                model=llm,
+                tools=MAP_TOOLS + music_tools,
+                system_prompt=ROUTING_SYSTEM_PROMPT,
+            )
 
-        self.sub_agents = {
-            "map": create_map_agent(),
-            "music": create_music_agent()
+        self._agent_factories = {
+            "map": create_map_agent,
+            "music": create_music_agent,
+            "router": create_router_agent
         }
-
-        self.logger.info(f"已加载 {len(self.sub_agents)} 个子Agent: {list(self.sub_agents.keys())}")
+        self._sub_agents: Dict[str, Any] = {}
+        self._sub_agents_lock = threading.Lock()
+
+        self.logger.info("已登记 %s 个Agent: %s", len(self._agent_factories), list(self._agent_factories.keys()))
+
+    def _get_agent(self, agent_type: str):
+        """获取子Agent，首次使用时创建"""
+        agent = self._sub_agents.get(agent_type)
+        if agent is None:
+            with self._sub_agents_lock:
+                agent = self._sub_agents.get(agent_type)
+                if agent is None:
+                    agent = self._agent_factories[agent_type]()
+                    self._sub_agents[agent_type] = agent
+        return agent
 
     def analyze_intent(self, user_input: str) -> AgentType:
         """
@@ -78,36 +303,78 @@ class SupervisorAgent:
         Returns:
             AgentType: 应该使用的Agent类型
         """
-        self.logger.info(f"开始分析用户意图: {user_input}")
+        return _run_sync(self.aanalyze_intent(user_input))
 
-        # 使用LLM进行意图分类
-        classification_prompt = f"""你是一个任务分类助手。根据用户的输入，判断应该使用哪个专业Agent来处理。
+    def analyze_intent_batch(self, inputs: List[str]) -> List[AgentType]:
+        """批量分析意图，各输入并发请求模型，结果与输入顺序一致"""
+        async def _gather():
+            return await asyncio.gather(*(self.aanalyze_intent(q) for q in inputs))
+        return list(_run_sync(_gather()))
 
-可用的Agent类型：
-- map: 地图相关任务，包括POI搜索、路径规划、地点查询、导航等
-- music: 音乐相关任务，包括搜索歌曲、播放音乐、音乐平台操作等
-- general: 其他一般性对话或无法分类的任务
+    async def aanalyze_intent(self, user_input: str) -> AgentType:
+        """analyze_intent 的异步版本，多个意图时返回第一个"""
+        agent_types = await self.aanalyze_intents(user_input)
+        return agent_types[0]
 
-用户输入: {user_input}
+    async def aanalyze_intents(self, user_input: str) -> List[AgentType]:
+        """
+        分析用户意图，返回需要参与处理的全部Agent类型
 
-请只返回Agent类型（map/music/general），不要返回其他内容。
-"""
+        复合任务（例如"导航去公司并播放音乐"）会返回多个类型，
+        由 aexecute_task 并发分发给对应的子Agent。
 
-        try:
-            response = llm.invoke([HumanMessage(content=classification_prompt)])
-            agent_type = response.content.strip().lower()
+        Args:
+            user_input: 用户输入文本
+
+        Returns:
+            List[AgentType]: Agent类型列表，至少包含一个元素
+        """
+        self.logger.info("开始分析用户意图: %s", user_input)
 
-            # 验证返回的类型
-            if agent_type not in ["map", "music", "general"]:
-                self.logger.warning(f"LLM返回了未知的Agent类型: {agent_type}，默认使用general")
-                agent_type = "general"
+        matched = self._match_keywords(user_input)
+        if matched is not None:
+            self.logger.info("关键词命中: %s", matched)
+            return [matched]
+
+        cached, vector = await self._intent_cache.aget(user_input)
+        if cached is not None:
+            self.logger.info("意图缓存命中: %s", cached)
+            return cached
+
+        # 使用LLM进行意图分类，静态前缀在前，命中服务端的提示词前缀缓存
+        classification_prompt = CLASSIFICATION_PROMPT_PREFIX + CLASSIFICATION_PROMPT_SUFFIX.format(user_input=user_input)
+
+        try:
+            response = await classifier_llm.ainvoke([HumanMessage(content=classification_prompt)])
+            agent_types = self._parse_agent_types(response.content)
+            self._intent_cache.put(user_input, agent_types, vector)
 
-            self.logger.info(f"意图分析结果: {agent_type}")
-            return agent_type
+            self.logger.info("意图分析结果: %s", agent_types)
+            return agent_types
 
         except Exception as e:
-            self.logger.error(f"意图分析失败: {e}", exc_info=True)
-            return "general"
+            self.logger.error("意图分析失败: %s", e, exc_info=True)
+            return ["general"]
+
+    def _match_keywords(self, user_input: str) -> Optional[AgentType]:
+        """关键词快速匹配，只有一类关键词命中时返回对应Agent类型，否则返回 None"""
+        return _match_keywords(user_input)
+
+    def _parse_agent_types(self, text: str) -> List[AgentType]:
+        """解析LLM返回的Agent类型列表，未知类型回退为general"""
+        agent_types = []
+        for item in text.strip().lower().split(","):
+            item = item.strip()
+            if item not in ["map", "music", "general"]:
+                self.logger.warning("LLM返回了未知的Agent类型: %s，默认使用general", item)
+                item = "general"
+            if item not in agent_types:
+                agent_types.append(item)
+
+        # general 只在没有专业Agent可用时才有意义
+        if len(agent_types) > 1 and "general" in agent_types:
+            agent_types.remove("general")
+        return agent_types
 
     def execute_task(
         self,
@@ -115,7 +382,67 @@ class SupervisorAgent:
         agent_type: AgentType = None
     ) -> TaskResult:
         """
-        执行任务
+        执行任务（同步接口，内部调用 aexecute_task）
+
+        Args:
+            user_input: 用户输入
+            agent_type: 指定的Agent类型，如果为None则自动分析
+
+        Returns:
+            TaskResult: 任务执行结果
+        """
+        return _run_sync(self.aexecute_task(user_input, agent_type))
+
+    def execute_task_batch(self, inputs: List[str]) -> List[TaskResult]:
+        """
+        批量执行相互独立的任务（同步接口），各任务并发执行
+
+        Args:
+            inputs: 用户输入列表
+
+        Returns:
+            List[TaskResult]: 与输入顺序一致的执行结果
+        """
+        return _run_sync(self.aexecute_task_batch(inputs))
+
+    async def aexecute_task_batch(self, inputs: List[str]) -> List[TaskResult]:
+        """execute_task_batch 的异步版本"""
+        return list(await asyncio.gather(*(self.aexecute_task(q) for q in inputs)))
+
+    def execute_task_stream(
+        self,
+        user_input: str,
+        agent_type: AgentType = None,
+        on_result: Optional[Callable[[TaskResult], None]] = None
+    ) -> Iterator[str]:
+        """
+        流式执行任务（同步接口），在后台事件循环中逐块驱动 aexecute_task_stream
+
+        Args:
+            user_input: 用户输入
+            agent_type: 指定的Agent类型，如果为None则自动路由
+            on_result: 执行结束后以 TaskResult 回调，便于调用方展示执行详情
+
+        Yields:
+            str: 回复文本片段
+        """
+        agen = self.aexecute_task_stream(user_input, agent_type, on_result)
+        try:
+            while True:
+                try:
+                    yield _run_sync(agen.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            _run_sync(agen.aclose())
+
+    async def aexecute_task(
+        self,
+        user_input: str,
+        agent_type: AgentType = None
+    ) -> TaskResult:
+        """
+        异步执行任务
 
         Args:
             user_input: 用户输入
@@ -124,100 +451,321 @@ class SupervisorAgent:
         Returns:
             TaskResult: 任务执行结果
         """
-        import time
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
+
+        from ..observability import observability, new_id
 
         # 生成任务ID用于追踪
-        import uuid
-        task_id = str(uuid.uuid4())[:8]
+        task_id = new_id()
 
-        self.logger.info(f"[任务 {task_id}] 开始执行")
-        self.logger.info(f"[任务 {task_id}] 用户输入: {user_input}")
+        self.logger.info("[任务 %s] 开始执行", task_id)
+        self.logger.info("[任务 %s] 用户输入: %s", task_id, user_input)
 
         # 记录到可观测性系统
-        from ..observability import observability
         trace_id = observability.start_trace(f"execute_task.{task_id}", {"user_input": user_input})
 
         try:
-            # 1. 意图识别
+            # 1. 路由：未指定Agent时先做关键词匹配，无法确定再由统一路由Agent
+            #    一次调用完成路由和执行
+            result_content = None
+            cache_vector = None
             if agent_type is None:
-                observability.record_event("intent_analysis", {"task_id": task_id})
-                agent_type = self.analyze_intent(user_input)
+                agent_type = self._match_keywords(user_input)
 
-            self.logger.info(f"[任务 {task_id}] 选择Agent: {agent_type}")
-            observability.record_event("agent_selection", {"task_id": task_id, "agent_type": agent_type})
+            if agent_type is None:
+                cached, cache_vector = await self._response_cache.aget(user_input)
+                if cached is not None:
+                    self.logger.info("[任务 %s] 回复缓存命中", task_id)
+                    return self._complete_task(task_id, trace_id, start_time, user_input, ["general"], cached, cached=True)
+                try:
+                    agent_types, result_content = await self._aroute(task_id, trace_id, user_input)
+                except Exception as e:
+                    # 回退到意图分类 + 子Agent分发
+                    self.logger.warning("[任务 %s] 统一路由失败，回退到意图分类: %s", task_id, e)
+                    observability.record_event("intent_analysis", {"task_id": task_id}, trace_id=trace_id)
+                    agent_types = await self.aanalyze_intents(user_input)
+            else:
+                agent_types = [agent_type]
+            agent_type = agent_types[0]
+
+            self.logger.info("[任务 %s] 选择Agent: %s", task_id, agent_types)
+            observability.record_event("agent_selection", {"task_id": task_id, "agent_type": agent_type}, trace_id=trace_id)
 
             # 2. 执行任务
-            if agent_type == "general":
-                # 一般性对话，直接用LLM回复
-                response = llm.invoke([HumanMessage(content=user_input)])
-                result_content = response.content
-
-            elif agent_type in self.sub_agents:
-                # 使用子Agent执行
-                agent = self.sub_agents[agent_type]
-                self.logger.info(f"[任务 {task_id}] 调用 {agent_type} Agent")
-                observability.record_event("agent_invocation", {"task_id": task_id, "agent_type": agent_type})
-
-                response = agent.invoke({
-                    "messages": [{"role": "user", "content": user_input}]
-                })
-
-                # 提取最后一条消息
-                messages = response.get("messages", [])
-                if messages:
-                    last_message = messages[-1]
-                    result_content = last_message.content if hasattr(last_message, 'content') else str(last_message)
-                else:
-                    result_content = "(Agent未返回内容)"
-            else:
-                raise ValueError(f"未知的Agent类型: {agent_type}")
-
-            # 3. 记录执行信息
-            execution_time = time.time() - start_time
-
-            result = TaskResult(
-                success=True,
-                agent_type=agent_type,
-                content=result_content,
-                metadata={
-                    "task_id": task_id,
-                    "execution_time": execution_time,
-                    "user_input": user_input,
-                    "trace_id": trace_id
-                }
+            if result_content is None:
+                result_content = await self._adispatch(task_id, trace_id, agent_types, user_input)
+
+            # 3. 保存到历史记录和可观测性系统
+            return self._complete_task(
+                task_id, trace_id, start_time, user_input, agent_types, result_content, cache_vector=cache_vector
             )
 
-            # 4. 保存到历史记录和可观测性系统
-            self._record_task(task_id, user_input, agent_type, result, execution_time)
-            observability.end_trace(trace_id, {"success": True, "execution_time": execution_time})
-            observability.record_metric(f"agent.{agent_type}.execution_time", execution_time)
-            observability.record_metric(f"agent.{agent_type}.success", 1)
+        except Exception as e:
+            return self._fail_task(task_id, trace_id, start_time, user_input, agent_type, e)
 
-            self.logger.info(f"[任务 {task_id}] 执行成功，耗时: {execution_time:.2f}秒")
-            return result
+    async def aexecute_task_stream(
+        self,
+        user_input: str,
+        agent_type: AgentType = None,
+        on_result: Optional[Callable[[TaskResult], None]] = None
+    ) -> AsyncIterator[str]:
+        """
+        流式执行任务，模型生成的回复片段到达后立即返回
 
-        except Exception as e:
-            execution_time = time.time() - start_time
-            self.logger.error(f"[任务 {task_id}] 执行失败: {e}", exc_info=True)
-
-            result = TaskResult(
-                success=False,
-                agent_type=agent_type or "unknown",
-                content=f"任务执行失败: {str(e)}",
-                error=str(e),
-                metadata={
-                    "task_id": task_id,
-                    "execution_time": execution_time,
-                    "user_input": user_input,
-                    "trace_id": trace_id
-                }
-            )
+        用户看到的是首个token的延迟，而不是完整回复的延迟。
+        执行结束后与 aexecute_task 一样记录历史和可观测数据。
+
+        Args:
+            user_input: 用户输入
+            agent_type: 指定的Agent类型，如果为None则自动路由
+            on_result: 执行结束后以 TaskResult 回调
+
+        Yields:
+            str: 回复文本片段
+        """
+        start_time = time.perf_counter_ns()
+
+        from ..observability import observability, new_id
+
+        task_id = new_id()
+        self.logger.info("[任务 %s] 开始流式执行", task_id)
+        self.logger.info("[任务 %s] 用户输入: %s", task_id, user_input)
+        trace_id = observability.start_trace(f"execute_task.{task_id}", {"user_input": user_input, "stream": True})
 
-            self._record_task(task_id, user_input, agent_type, result, execution_time)
-            observability.end_trace(trace_id, {"success": False, "error": str(e)})
-            observability.record_metric(f"agent.{agent_type or 'unknown'}.failure", 1)
-            return result
+        if agent_type is None:
+            agent_type = self._match_keywords(user_input)
+
+        # 统一路由时，Agent类型在流式过程中根据调用的工具填充
+        agent_types = [] if agent_type is None else [agent_type]
+        chunks = []
+        result = None
+        try:
+            try:
+                # 缓存查找可能触发句向量模型加载，失败时同样按任务失败记录
+                cached, cache_vector = await self._response_cache.aget(user_input) if agent_type is None else (None, None)
+                if cached is None:
+                    async for chunk in self._astream_agent(task_id, trace_id, agent_type or "router", user_input, agent_types):
+                        chunks.append(chunk)
+                        yield chunk
+            except Exception as e:
+                result = self._fail_task(task_id, trace_id, start_time, user_input, agent_type, e)
+                if on_result:
+                    on_result(result)
+                yield f"任务执行失败: {str(e)}"
+                return
+
+            if cached is not None:
+                self.logger.info("[任务 %s] 回复缓存命中", task_id)
+                yield cached
+                result = self._complete_task(task_id, trace_id, start_time, user_input, ["general"], cached, cached=True)
+            else:
+                result = self._complete_task(
+                    task_id, trace_id, start_time, user_input, agent_types or ["general"], "".join(chunks),
+                    cache_vector=cache_vector
+                )
+        except (GeneratorExit, asyncio.CancelledError):
+            # 调用方中途停止读取（页面重新运行、连接断开）或任务被取消：
+            # 同样记录为失败任务并结束追踪，保证历史和统计完整
+            if result is None:
+                result = self._fail_task(
+                    task_id, trace_id, start_time, user_input, agent_type, RuntimeError("任务已取消")
+                )
+                if on_result:
+                    on_result(result)
+            raise
+        if on_result:
+            on_result(result)
+
+    async def _astream_agent(
+        self,
+        task_id: str,
+        trace_id: str,
+        agent_type: str,
+        user_input: str,
+        agent_types: List[AgentType]
+    ) -> AsyncIterator[str]:
+        """流式调用单个Agent，router 调用的工具所属Agent类型追加到 agent_types"""
+        from ..observability import observability
+
+        if agent_type == "general":
+            async for chunk in llm.astream([HumanMessage(content=user_input)]):
+                if chunk.content:
+                    yield chunk.content
+            return
+
+        if agent_type not in self._agent_factories:
+            raise ValueError(f"未知的Agent类型: {agent_type}")
+
+        agent = self._get_agent(agent_type)
+        self.logger.info("[任务 %s] 流式调用 %s Agent", task_id, agent_type)
+        observability.record_event("agent_invocation", {"task_id": task_id, "agent_type": agent_type}, trace_id=trace_id)
+
+        async for event in agent.astream_events(
+            {"messages": [{"role": "user", "content": user_input}]},
+            version="v2"
+        ):
+            kind = event["event"]
+            if kind == "on_tool_start":
+                owner = self.tool_owners.get(event["name"])
+                if owner and owner not in agent_types:
+                    agent_types.append(owner)
+            elif kind == "on_chat_model_stream":
+                content = event["data"]["chunk"].content
+                if content:
+                    yield content
+
+    def _complete_task(
+        self,
+        task_id: str,
+        trace_id: str,
+        start_time: int,
+        user_input: str,
+        agent_types: List[AgentType],
+        result_content: str,
+        cached: bool = False,
+        cache_vector=None
+    ) -> TaskResult:
+        """记录成功的任务并返回结果，一般对话的回复连同查找时算出的句向量写入回复缓存"""
+        from ..observability import observability
+
+        agent_type = agent_types[0]
+        execution_time_ns = time.perf_counter_ns() - start_time
+        execution_time = execution_time_ns / 1e9
+
+        result = TaskResult(
+            success=True,
+            agent_type=agent_type,
+            content=result_content,
+            metadata={
+                "task_id": task_id,
+                "execution_time": execution_time,
+                "execution_time_ns": execution_time_ns,
+                "user_input": user_input,
+                "trace_id": trace_id,
+                "agent_types": agent_types,
+                "cached": cached
+            }
+        )
+
+        if agent_types == ["general"] and not cached:
+            self._response_cache.put(user_input, result_content, cache_vector)
+        self._record_task(task_id, user_input, agent_type, result, execution_time)
+        observability.end_trace(trace_id, {"success": True, "execution_time": execution_time})
+        observability.record_metric(f"agent.{agent_type}.execution_time", execution_time)
+        observability.record_metric(f"agent.{agent_type}.success", 1)
+
+        self.logger.info("[任务 %s] 执行成功，耗时: %.2f秒", task_id, execution_time)
+        return result
+
+    def _fail_task(
+        self,
+        task_id: str,
+        trace_id: str,
+        start_time: int,
+        user_input: str,
+        agent_type: Optional[AgentType],
+        error: Exception
+    ) -> TaskResult:
+        """记录失败的任务并返回结果"""
+        from ..observability import observability
+
+        execution_time_ns = time.perf_counter_ns() - start_time
+        execution_time = execution_time_ns / 1e9
+        self.logger.error("[任务 %s] 执行失败: %s", task_id, error, exc_info=error)
+
+        result = TaskResult(
+            success=False,
+            agent_type=agent_type or "unknown",
+            content=f"任务执行失败: {str(error)}",
+            error=str(error),
+            metadata={
+                "task_id": task_id,
+                "execution_time": execution_time,
+                "execution_time_ns": execution_time_ns,
+                "user_input": user_input,
+                "trace_id": trace_id
+            }
+        )
+
+        self._record_task(task_id, user_input, agent_type, result, execution_time)
+        observability.end_trace(trace_id, {"success": False, "error": str(error)})
+        observability.record_metric(f"agent.{agent_type or 'unknown'}.failure", 1)
+        return result
+
+    async def _adispatch(self, task_id: str, trace_id: str, agent_types: List[AgentType], user_input: str) -> str:
+        """把任务分发给一个或多个子Agent，多个时并发执行"""
+        if len(agent_types) == 1:
+            return await self._ainvoke_agent(task_id, trace_id, agent_types[0], user_input)
+
+        # 复合任务：并发调用多个子Agent，网络等待互相重叠
+        results = await asyncio.gather(
+            *(self._ainvoke_agent(task_id, trace_id, t, user_input) for t in agent_types),
+            return_exceptions=True
+        )
+        parts = []
+        for t, res in zip(agent_types, results):
+            if isinstance(res, Exception):
+                self.logger.error("[任务 %s] %s Agent 执行失败: %s", task_id, t, res)
+                res = f"{t} Agent 执行失败: {res}"
+            parts.append(res)
+        return "\n\n".join(parts)
+
+    async def _aroute(self, task_id: str, trace_id: str, user_input: str):
+        """
+        通过统一路由Agent执行任务
+
+        Returns:
+            (agent_types, content): 根据实际调用的工具推断出的Agent类型列表，以及最终回复
+        """
+        from ..observability import observability
+
+        self.logger.info("[任务 %s] 调用统一路由Agent", task_id)
+        observability.record_event("agent_invocation", {"task_id": task_id, "agent_type": "router"}, trace_id=trace_id)
+
+        response = await self._get_agent("router").ainvoke({
+            "messages": [{"role": "user", "content": user_input}]
+        })
+
+        messages = response.get("messages", [])
+        agent_types = []
+        for message in messages:
+            for tool_call in getattr(message, "tool_calls", None) or []:
+                owner = self.tool_owners.get(tool_call["name"])
+                if owner and owner not in agent_types:
+                    agent_types.append(owner)
+
+        # 没有调用任何工具即为一般性对话
+        return agent_types or ["general"], self._extract_content(response)
+
+    def _extract_content(self, response: Dict[str, Any]) -> str:
+        """提取Agent响应中最后一条消息的内容"""
+        messages = response.get("messages", [])
+        if messages:
+            last_message = messages[-1]
+            return last_message.content if hasattr(last_message, 'content') else str(last_message)
+        return "(Agent未返回内容)"
+
+    async def _ainvoke_agent(self, task_id: str, trace_id: str, agent_type: AgentType, user_input: str) -> str:
+        """调用单个Agent并返回最终回复文本"""
+        from ..observability import observability
+
+        if agent_type == "general":
+            # 一般性对话，直接用LLM回复
+            response = await llm.ainvoke([HumanMessage(content=user_input)])
+            return response.content
+
+        if agent_type not in ("map", "music"):
+            raise ValueError(f"未知的Agent类型: {agent_type}")
+
+        # 使用子Agent执行
+        agent = self._get_agent(agent_type)
+        self.logger.info("[任务 %s] 调用 %s Agent", task_id, agent_type)
+        observability.record_event("agent_invocation", {"task_id": task_id, "agent_type": agent_type}, trace_id=trace_id)
+
+        response = await agent.ainvoke({
+            "messages": [{"role": "user", "content": user_input}]
+        })
+        return self._extract_content(response)
 
     def _record_task(
         self,
@@ -227,7 +775,7 @@ class SupervisorAgent:
         result: TaskResult,
         execution_time: float
     ):
-        """记录任务执行历史"""
+        """记录任务执行历史（只保存一份扁平字典，不重复保存 result.to_dict()）"""
         import datetime
 
         record = {
@@ -237,18 +785,39 @@ class SupervisorAgent:
             "agent_type": agent_type,
             "success": result.success,
             "execution_time": execution_time,
-            "result": result.to_dict()
+            "content": result.content,
+            "error": result.error,
+            "trace_id": result.metadata.get("trace_id")
         }
 
+        # 历史记录已满时，最早的一条会被 deque 自动挤出
+        if len(self.task_history) == self.task_history.maxlen:
+            self._count_record(self.task_history[0], -1)
+
         self.task_history.append(record)
+        self._count_record(record, 1)
 
-        # 限制历史记录数量
-        if len(self.task_history) > 100:
-            self.task_history = self.task_history[-100:]
+    def _count_record(self, record: Dict[str, Any], sign: int):
+        """把一条记录计入（sign=1）或移出（sign=-1）统计计数器"""
+        self._success_count += sign * bool(record["success"])
+        self._time_sum += sign * record["execution_time"]
+        agent_type = record["agent_type"]
+        self._agent_usage[agent_type] += sign
+        if self._agent_usage[agent_type] <= 0:
+            del self._agent_usage[agent_type]
 
     def get_task_history(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """获取任务执行历史"""
-        return self.task_history[-limit:]
+        """获取最近 limit 条任务执行历史（按时间先后排列），从队尾反向截取，开销只与 limit 有关"""
+        recent = list(itertools.islice(reversed(self.task_history), limit))
+        recent.reverse()
+        return recent
+
+    def clear_history(self):
+        """清除任务执行历史和统计"""
+        self.task_history.clear()
+        self._success_count = 0
+        self._time_sum = 0.0
+        self._agent_usage.clear()
 
     def get_statistics(self) -> Dict[str, Any]:
         """获取统计信息"""
@@ -261,24 +830,11 @@ class SupervisorAgent:
             }
 
         total = len(self.task_history)
-        success_count = sum(1 for t in self.task_history if t["success"])
-
-        # 按Agent类型统计
-        agent_usage = {}
-        for task in self.task_history:
-            agent_type = task["agent_type"]
-            if agent_type not in agent_usage:
-                agent_usage[agent_type] = 0
-            agent_usage[agent_type] += 1
-
-        # 平均执行时间
-        avg_time = sum(t["execution_time"] for t in self.task_history) / total
-
         return {
             "total_tasks": total,
-            "success_rate": success_count / total,
-            "avg_execution_time": avg_time,
-            "agent_usage": agent_usage
+            "success_rate": self._success_count / total,
+            "avg_execution_time": self._time_sum / total,
+            "agent_usage": dict(self._agent_usage)
         }
 
 
@@ -9,6 +9,20 @@ CHROME_BINARY_PATH = os.getenv("CHROME_BINARY_PATH", "")
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 LLM_MODEL = os.getenv("LLM_MODEL", "ollama/deepseek-v3.1:671b-cloud")
 MUSIC_PLATFORM = os.getenv("MUSIC_PLATFORM", "qq")
+# 意图分类 LLM 的响应缓存文件 (SQLite)，默认置空只使用进程内缓存
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "")
+# 模型在 Ollama 中的驻留时间，保持加载才能复用服务端的提示词前缀 KV 缓存
+LLM_KEEP_ALIVE = os.getenv("LLM_KEEP_ALIVE", "30m")
+# 意图分类语义缓存使用的句向量模型 (需要安装 sentence-transformers)
+INTENT_CACHE_MODEL = os.getenv("INTENT_CACHE_MODEL", "sentence-transformers/paraphrase-MiniLM-L3-v2")
+INTENT_CACHE_THRESHOLD = float(os.getenv("INTENT_CACHE_THRESHOLD", "0.92"))
+# 一般对话回复的语义缓存：相似度阈值与过期时间(秒)
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.95"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "600"))
+# 可观测数据（追踪/事件/单个指标）在内存中保留的最大条数，超出后最早的记录被覆盖
+OBS_RING_SIZE = int(os.getenv("OBS_RING_SIZE", "1000"))
+# 追踪采样率 (0~1)，未被采样的追踪不记录任何 span 及其所属事件
+OBS_SAMPLE_RATE = float(os.getenv("OBS_SAMPLE_RATE", "1.0"))
 
 if not OLLAMA_BASE_URL:
     raise ValueError("OLLAMA_BASE_URL is required")
@@ -2,8 +2,10 @@
 LLM 配置模块 - 使用 LangChain 1.0 推荐的 Ollama 集成
 """
 import logging
+import httpx
+from langchain_core.caches import InMemoryCache
 from langchain_ollama import ChatOllama
-from .config import OLLAMA_BASE_URL, LLM_MODEL
+from .config import OLLAMA_BASE_URL, LLM_MODEL, LLM_CACHE_PATH, LLM_KEEP_ALIVE
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -11,13 +13,30 @@ logger = logging.getLogger(__name__)
 # 从 "ollama/model_name" 格式中提取模型名
 model_name = LLM_MODEL.replace("ollama/", "") if LLM_MODEL.startswith("ollama/") else LLM_MODEL
 
-logger.info(f"初始化 Ollama 模型: {model_name} @ {OLLAMA_BASE_URL}")
+logger.info("初始化 Ollama 模型: %s @ %s", model_name, OLLAMA_BASE_URL)
+
+# Ollama 客户端的 HTTP 连接池，保持长连接并允许并发请求（asyncio.gather 分发子Agent）
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
 
 # 使用 LangChain 1.0 推荐的 ChatOllama
+# keep_alive 让模型常驻内存，各 Agent 的系统提示词与工具定义均为静态常量，
+# 前缀逐字节相同的请求可复用 Ollama 已计算的 KV 缓存，缩短首 token 延迟
 llm = ChatOllama(
     model=model_name,
     base_url=OLLAMA_BASE_URL,
     temperature=0.0,
+    keep_alive=LLM_KEEP_ALIVE,
+    client_kwargs={"limits": HTTP_LIMITS},
 )
 
+# 意图分类专用实例：分类结果只取决于输入文本，完全相同的提示词直接命中缓存；
+# 一般对话和 Agent 工具调用仍走不带缓存的 llm，避免返回过期回复
+if LLM_CACHE_PATH:
+    from langchain_community.cache import SQLiteCache
+    _classifier_cache = SQLiteCache(database_path=LLM_CACHE_PATH)
+    logger.info("意图分类 LLM 缓存: %s", LLM_CACHE_PATH)
+else:
+    _classifier_cache = InMemoryCache()
+classifier_llm = llm.model_copy(update={"cache": _classifier_cache})
+
 logger.info("LLM 初始化成功")
@@ -2,20 +2,44 @@
 日志配置模块
 配置应用程序的日志系统
 """
+import atexit
 import logging
+import os
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from datetime import datetime
 
-def setup_logging(log_level=logging.INFO, log_file=None, log_dir=None):
+# 后台写日志的监听线程，保存在模块级别避免被回收
+_listener = None
+_INITIALIZED = False
+
+# 日志格式和控制台handler只创建一次
+_FORMATTER = logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+_CONSOLE_HANDLER = logging.StreamHandler(sys.stdout)
+_CONSOLE_HANDLER.setFormatter(_FORMATTER)
+
+def setup_logging(log_level=logging.INFO, log_file=None, log_dir=None, force=False):
     """
     设置应用程序日志
     
+    模块导入时已按环境变量初始化一次，重复调用直接返回，除非指定 force。
+    
     Args:
         log_level: 日志级别（默认 INFO）
         log_file: 日志文件路径（可选）
         log_dir: 日志目录（可选，默认使用环境变量或固定路径）
+        force: 是否强制重新初始化
     """
+    global _listener, _INITIALIZED
+
+    if _INITIALIZED and not force:
+        return
+
     # 如果没有指定log_file，自动生成带日期时间的文件名
     if log_file is None:
         if log_dir is None:
@@ -29,20 +53,18 @@ def setup_logging(log_level=logging.INFO, log_file=None, log_dir=None):
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
     
-    # 清除现有handlers
+    # 清除现有handlers，并停止上一次初始化的监听线程
     root_logger.handlers.clear()
-    
-    # 日志格式
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            if handler is not _CONSOLE_HANDLER:
+                handler.close()
+        _listener = None
     
     # 控制台handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(log_level)
-    console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    _CONSOLE_HANDLER.setLevel(log_level)
+    handlers = [_CONSOLE_HANDLER]
     
     # 文件handler
     if log_file:
@@ -51,18 +73,31 @@ def setup_logging(log_level=logging.INFO, log_file=None, log_dir=None):
         
         file_handler = logging.FileHandler(log_file, encoding='utf-8')
         file_handler.setLevel(log_level)
-        file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        file_handler.setFormatter(_FORMATTER)
+        handlers.append(file_handler)
+    
+    # 日志调用只做入队，实际的控制台/文件写入由监听线程完成
+    log_queue = queue.Queue(-1)
+    root_logger.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
     
     # 设置第三方库日志级别
     logging.getLogger('urllib3').setLevel(logging.WARNING)
     logging.getLogger('httpx').setLevel(logging.WARNING)
     logging.getLogger('httpcore').setLevel(logging.WARNING)
     
-    logging.info(f"日志系统初始化完成，日志文件: {log_file}")
+    _INITIALIZED = True
+    logging.info("日志系统初始化完成，日志文件: %s", log_file)
+
+def _stop_listener():
+    """进程退出前把队列中剩余的日志写完"""
+    if _listener is not None:
+        _listener.stop()
+
+atexit.register(_stop_listener)
 
 # 默认初始化（可通过环境变量控制）
-import os
 log_level_str = os.getenv("LOG_LEVEL", "INFO")
 log_level = getattr(logging, log_level_str.upper(), logging.INFO)
 log_file = os.getenv("LOG_FILE")
@@ -2,7 +2,11 @@
 可观测性增强模块
 提供统一的日志、追踪、监控和性能分析功能
 """
+import atexit
 import logging
+import os
+import queue
+import random
 import time
 import json
 from typing import Dict, Any, List, Optional, Callable
@@ -10,12 +14,220 @@ from pathlib import Path
 from datetime import datetime
 from functools import wraps
 import threading
+from collections import deque
+from dataclasses import dataclass
+from itertools import count, islice
+
+import numpy as np
+
+from .config import OBS_RING_SIZE, OBS_SAMPLE_RATE
+
+# orjson 序列化速度更快，未安装时回退到标准库 json
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# 追踪/任务ID：进程号前缀 + 单调计数器，避免每次调用 uuid4 读取系统随机数
+_ID_PREFIX = format(os.getpid() & 0xffff, '04x')
+_id_counter = count()
+
+
+# 未被采样的追踪返回的ID，对应的 end_trace/trace 调用直接忽略
+NOOP_TRACE_ID = "unsampled"
+_random = random.random
+
+
+def new_id() -> str:
+    """生成进程内唯一的短ID"""
+    return _ID_PREFIX + format(next(_id_counter), '04x')
+
+
+class _Record:
+    """记录基类：存储时使用 __slots__ 对象，读取/导出时才转换为字典"""
+
+    __slots__ = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@dataclass(slots=True)
+class Span(_Record):
+    """一条追踪记录"""
+    trace_id: str
+    span_name: str
+    timestamp: float
+    metadata: Dict[str, Any]
+
+
+@dataclass(slots=True)
+class Event(_Record):
+    """一条事件记录"""
+    event_type: str
+    timestamp: float
+    data: Dict[str, Any]
+
+
+def _tail_records(records: deque, limit: int):
+    """迭代 deque 中最后 limit 条记录"""
+    return islice(records, max(0, len(records) - limit), None)
+
+
+def _tail(records: deque, limit: int) -> List[Dict[str, Any]]:
+    """返回 deque 中最后 limit 条记录"""
+    return [r.to_dict() for r in _tail_records(records, limit)]
+
+
+def _export_records(record_type: str, records) -> List[Dict[str, Any]]:
+    """导出时才把 time.time() 时间戳转换为 datetime（由序列化器输出 ISO 字符串），并标注记录类型"""
+    return [
+        {"type": record_type, **r.to_dict(), "timestamp": datetime.fromtimestamp(r.timestamp)}
+        for r in records
+    ]
+
+
+class _ThreadBuffer:
+    """
+    单个线程的待合并记录，只由所属线程追加，由后台线程合并到全局存储
+
+    两次合并之间写满时最早的记录会被挤出；挤出条数只由所属线程累加，
+    后台线程通过 reported_* 计算增量，两边各写各的计数器，无需加锁。
+    """
+
+    def __init__(self, owner: threading.Thread, maxlen: int):
+        self.owner = owner
+        self.traces: deque = deque(maxlen=maxlen)
+        self.events: deque = deque(maxlen=maxlen)
+        self.metrics: deque = deque(maxlen=maxlen)  # (metric_name, value)
+        self.dropped_traces = 0
+        self.dropped_events = 0
+        self.reported_traces = 0
+        self.reported_events = 0
+
+    def add_trace(self, span: Span):
+        if len(self.traces) == self.traces.maxlen:
+            self.dropped_traces += 1
+        self.traces.append(span)
+
+    def add_event(self, event: Event):
+        if len(self.events) == self.events.maxlen:
+            self.dropped_events += 1
+        self.events.append(event)
+
+    def take_dropped(self) -> tuple:
+        """返回上次调用以来被挤出的 (追踪条数, 事件条数)，只由后台线程调用"""
+        traces, events = self.dropped_traces, self.dropped_events
+        delta = (traces - self.reported_traces, events - self.reported_events)
+        self.reported_traces, self.reported_events = traces, events
+        return delta
+
+    def is_empty(self) -> bool:
+        return not (self.traces or self.events or self.metrics)
+
+
+class _MetricRing:
+    """单个指标的定长环形缓冲区，写入不分配内存，统计直接在连续的 float64 数组上计算"""
+
+    __slots__ = ("buf", "idx", "count")
+
+    def __init__(self, size: int):
+        self.buf = np.empty(size, dtype=np.float64)
+        self.idx = 0
+        self.count = 0
+
+    def append(self, value: float):
+        self.buf[self.idx] = value
+        self.idx = (self.idx + 1) % len(self.buf)
+        self.count += 1
+
+    def __len__(self) -> int:
+        return min(self.count, len(self.buf))
+
+    def values(self) -> np.ndarray:
+        """有效数据（不保证时间顺序，用于统计）"""
+        return self.buf[:len(self)]
+
+    def ordered(self) -> np.ndarray:
+        """按写入顺序返回数据（连续数组，可直接交给 orjson 序列化）"""
+        if self.count <= len(self.buf):
+            return self.buf[:self.count]
+        return np.concatenate((self.buf[self.idx:], self.buf[:self.idx]))
+
+    def tolist(self) -> List[float]:
+        """按写入顺序返回数据"""
+        return self.ordered().tolist()
+
+
+class _LazyJson:
+    """日志参数包装：只有日志真正输出时才做 JSON 序列化"""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: Any):
+        self.data = data
+
+    def __str__(self) -> str:
+        return json.dumps(self.data, ensure_ascii=False)
+
+
+def _drain(source: deque):
+    """逐条弹出 source 中的记录（与所属线程的 append 并发安全）"""
+    while True:
+        try:
+            yield source.popleft()
+        except IndexError:
+            return
+
+
+def _extend_ring(ring: deque, source: deque) -> tuple:
+    """把 source 中的记录合并进定长 ring，返回 (合并条数, 被挤出的旧记录条数)"""
+    batch = list(_drain(source))
+    dropped = max(0, len(ring) + len(batch) - ring.maxlen)
+    ring.extend(batch)
+    return len(batch), dropped
+
+
+# 导出文件写缓冲大小
+_EXPORT_BUFFER_SIZE = 1 << 20
+
+
+def _json_default(obj: Any) -> Any:
+    """标准库 json 回退时处理 orjson 原生支持的 datetime / numpy 类型"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE
+
+    def _dumps_line(obj: Any) -> bytes:
+        """序列化为一行 NDJSON（含换行符）"""
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS)
+else:  # pragma: no cover
+    def _dumps_line(obj: Any) -> bytes:
+        """序列化为一行 NDJSON（含换行符）"""
+        return (json.dumps(obj, ensure_ascii=False, default=_json_default) + "\n").encode("utf-8")
+
+
+def _iter_ndjson_lines(records: List[Dict[str, Any]]):
+    """逐条生成 NDJSON 行（每条记录一行），文件可以直接追加写入"""
+    return map(_dumps_line, records)
+
 
 class ObservabilityManager:
-    """可观测性管理器 - 单例模式"""
+    """
+    可观测性管理器 - 单例模式
+
+    记录写入当前线程私有的缓冲区，热路径上不需要加锁；
+    后台线程每隔 flush_interval 秒把各线程缓冲区合并到全局存储，
+    读取接口在读取前也会同步合并一次，保证读到最新数据。
+    """
 
     _instance = None
     _lock = threading.Lock()
@@ -34,14 +246,37 @@ class ObservabilityManager:
         self._initialized = True
         self.logger = logging.getLogger(__name__ + ".ObservabilityManager")
 
-        # 追踪数据存储
-        self.traces: List[Dict[str, Any]] = []
-        self.metrics: Dict[str, List[float]] = {}
-        self.events: List[Dict[str, Any]] = []
-
         # 配置
-        self.max_traces = 1000
-        self.max_events = 1000
+        self.max_traces = OBS_RING_SIZE
+        self.max_events = OBS_RING_SIZE
+        self.max_metric_values = OBS_RING_SIZE
+        self.flush_interval = 1.0
+        self.sample_rate = OBS_SAMPLE_RATE
+
+        # 追踪数据存储，超出容量时最早的记录被自动挤出
+        self.traces: deque = deque(maxlen=self.max_traces)
+        self.metrics: Dict[str, _MetricRing] = {}
+        self.events: deque = deque(maxlen=self.max_events)
+        # 丢弃条数：全局存储被挤出的记录 + 线程缓冲区在合并前被挤出的记录
+        self.dropped_traces = 0
+        self.dropped_events = 0
+        # 累计合并进全局存储的条数，用于定位导出文件中尚未写入的记录
+        self._merged_traces = 0
+        self._merged_events = 0
+
+        # 每个导出文件已写入的 (追踪总数, 事件总数)，再次导出到同一文件时只追加新记录
+        self._export_cursors: Dict[Path, tuple] = {}
+
+        # 线程私有缓冲区
+        self._tls = threading.local()
+        self._buffers: List[_ThreadBuffer] = []
+        self._flush_lock = threading.RLock()
+        threading.Thread(target=self._flush_loop, name="observability-flush", daemon=True).start()
+
+        # 导出文件由后台线程序列化和写入，不阻塞调用方
+        self._write_q: queue.Queue = queue.Queue()
+        threading.Thread(target=self._writer_loop, name="observability-writer", daemon=True).start()
+        atexit.register(self._write_q.join)
 
         # 日志文件
         self.log_dir = Path("logs")
@@ -49,6 +284,49 @@ class ObservabilityManager:
 
         self.logger.info("ObservabilityManager 初始化完成")
 
+    def _buffer(self) -> _ThreadBuffer:
+        """获取当前线程的缓冲区，首次使用时创建并登记"""
+        buffer = getattr(self._tls, "buffer", None)
+        if buffer is None:
+            buffer = _ThreadBuffer(threading.current_thread(), max(self.max_traces, self.max_events))
+            with self._flush_lock:
+                self._buffers.append(buffer)
+            self._tls.buffer = buffer
+        return buffer
+
+    def _flush_loop(self):
+        """后台线程：定期合并各线程缓冲区"""
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.error("合并可观测数据失败: %s", e)
+
+    def flush(self):
+        """把所有线程缓冲区中的记录合并到全局存储"""
+        with self._flush_lock:
+            for buffer in list(self._buffers):
+                merged_traces, dropped_traces = _extend_ring(self.traces, buffer.traces)
+                merged_events, dropped_events = _extend_ring(self.events, buffer.events)
+                overflow_traces, overflow_events = buffer.take_dropped()
+                self._merged_traces += merged_traces
+                self._merged_events += merged_events
+                self.dropped_traces += dropped_traces + overflow_traces
+                self.dropped_events += dropped_events + overflow_events
+                for metric_name, value in _drain(buffer.metrics):
+                    if metric_name not in self.metrics:
+                        self.metrics[metric_name] = _MetricRing(self.max_metric_values)
+                    self.metrics[metric_name].append(value)
+
+                # 线程已结束且数据已合并，注销其缓冲区
+                if not buffer.owner.is_alive() and buffer.is_empty():
+                    self._buffers.remove(buffer)
+
+    def sampled(self) -> bool:
+        """按 sample_rate 决定新追踪是否记录"""
+        return self.sample_rate >= 1.0 or _random() < self.sample_rate
+
     def start_trace(self, span_name: str, metadata: Dict[str, Any] = None) -> str:
         """
         开始一个新的追踪
@@ -58,23 +336,14 @@ class ObservabilityManager:
             metadata: 元数据
 
         Returns:
-            trace_id: 追踪ID
+            trace_id: 追踪ID；未被采样时返回 NOOP_TRACE_ID
         """
-        import uuid
-        trace_id = str(uuid.uuid4())[:8]
+        if not self.sampled():
+            return NOOP_TRACE_ID
 
-        trace = {
-            "trace_id": trace_id,
-            "span_name": f"{span_name}.start",
-            "timestamp": datetime.now().isoformat(),
-            "metadata": metadata or {}
-        }
+        trace_id = new_id()
 
-        self.traces.append(trace)
-
-        # 限制追踪数量
-        if len(self.traces) > self.max_traces:
-            self.traces = self.traces[-self.max_traces:]
+        self._buffer().add_trace(Span(trace_id, f"{span_name}.start", time.time(), metadata or {}))
 
         return trace_id
 
@@ -86,18 +355,10 @@ class ObservabilityManager:
             trace_id: 追踪ID
             metadata: 元数据
         """
-        trace = {
-            "trace_id": trace_id,
-            "span_name": "end",
-            "timestamp": datetime.now().isoformat(),
-            "metadata": metadata or {}
-        }
-
-        self.traces.append(trace)
+        if trace_id == NOOP_TRACE_ID:
+            return
 
-        # 限制追踪数量
-        if len(self.traces) > self.max_traces:
-            self.traces = self.traces[-self.max_traces:]
+        self._buffer().add_trace(Span(trace_id, "end", time.time(), metadata or {}))
 
     def trace(self, trace_id: str, span_name: str, metadata: Dict[str, Any] = None):
         """
@@ -108,18 +369,10 @@ class ObservabilityManager:
             span_name: span名称
             metadata: 元数据
         """
-        trace = {
-            "trace_id": trace_id,
-            "span_name": span_name,
-            "timestamp": datetime.now().isoformat(),
-            "metadata": metadata or {}
-        }
-
-        self.traces.append(trace)
+        if trace_id == NOOP_TRACE_ID:
+            return
 
-        # 限制追踪数量
-        if len(self.traces) > self.max_traces:
-            self.traces = self.traces[-self.max_traces:]
+        self._buffer().add_trace(Span(trace_id, span_name, time.time(), metadata or {}))
 
     def record_metric(self, metric_name: str, value: float):
         """
@@ -129,97 +382,129 @@ class ObservabilityManager:
             metric_name: 指标名称
             value: 指标值
         """
-        if metric_name not in self.metrics:
-            self.metrics[metric_name] = []
+        self._buffer().metrics.append((metric_name, value))
 
-        self.metrics[metric_name].append(value)
-
-        # 限制每个指标的存储数量
-        if len(self.metrics[metric_name]) > 1000:
-            self.metrics[metric_name] = self.metrics[metric_name][-1000:]
-
-    def record_event(self, event_type: str, data: Dict[str, Any]):
+    def record_event(self, event_type: str, data: Dict[str, Any], trace_id: Optional[str] = None):
         """
         记录事件
 
         Args:
             event_type: 事件类型
             data: 事件数据
+            trace_id: 事件所属的追踪ID；为 NOOP_TRACE_ID（未被采样）时不记录，
+                不属于任何追踪的事件总是记录
         """
-        event = {
-            "event_type": event_type,
-            "timestamp": datetime.now().isoformat(),
-            "data": data
-        }
-
-        self.events.append(event)
+        if trace_id == NOOP_TRACE_ID:
+            return
 
-        # 限制事件数量
-        if len(self.events) > self.max_events:
-            self.events = self.events[-self.max_events:]
+        self._buffer().add_event(Event(event_type, time.time(), data))
 
-        self.logger.info(f"事件记录: {event_type} - {json.dumps(data, ensure_ascii=False)}")
+        self.logger.info("事件记录: %s - %s", event_type, _LazyJson(data))
 
     def get_traces(self, trace_id: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
         """获取追踪记录"""
-        if trace_id:
-            filtered = [t for t in self.traces if t["trace_id"] == trace_id]
-            return filtered[-limit:]
-        return self.traces[-limit:]
+        with self._flush_lock:
+            self.flush()
+            if trace_id:
+                filtered = [t.to_dict() for t in self.traces if t.trace_id == trace_id]
+                return filtered[-limit:]
+            return _tail(self.traces, limit)
 
     def get_metrics(self, metric_name: Optional[str] = None) -> Dict[str, List[float]]:
         """获取指标数据"""
-        if metric_name:
-            return {metric_name: self.metrics.get(metric_name, [])}
-        return self.metrics
+        with self._flush_lock:
+            self.flush()
+            if metric_name:
+                ring = self.metrics.get(metric_name)
+                return {metric_name: ring.tolist() if ring else []}
+            return {k: v.tolist() for k, v in self.metrics.items()}
 
     def get_events(self, event_type: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
         """获取事件记录"""
-        if event_type:
-            filtered = [e for e in self.events if e["event_type"] == event_type]
-            return filtered[-limit:]
-        return self.events[-limit:]
+        with self._flush_lock:
+            self.flush()
+            if event_type:
+                filtered = [e.to_dict() for e in self.events if e.event_type == event_type]
+                return filtered[-limit:]
+            return _tail(self.events, limit)
 
     def get_statistics(self) -> Dict[str, Any]:
         """获取统计摘要"""
-        stats = {
-            "total_traces": len(self.traces),
-            "total_events": len(self.events),
-            "metrics_count": len(self.metrics),
-            "metric_summary": {}
-        }
-
-        # 计算每个指标的统计信息
-        for metric_name, values in self.metrics.items():
-            if values:
-                stats["metric_summary"][metric_name] = {
-                    "count": len(values),
-                    "min": min(values),
-                    "max": max(values),
-                    "avg": sum(values) / len(values)
-                }
+        with self._flush_lock:
+            self.flush()
+            stats = {
+                "total_traces": len(self.traces),
+                "total_events": len(self.events),
+                "dropped_traces": self.dropped_traces,
+                "dropped_events": self.dropped_events,
+                "metrics_count": len(self.metrics),
+                "metric_summary": {}
+            }
+
+            # 计算每个指标的统计信息
+            for metric_name, ring in self.metrics.items():
+                if len(ring):
+                    values = ring.values()
+                    stats["metric_summary"][metric_name] = {
+                        "count": len(values),
+                        "min": float(values.min()),
+                        "max": float(values.max()),
+                        "avg": float(values.mean())
+                    }
 
         return stats
 
-    def export_to_file(self, filename: Optional[str] = None):
-        """导出可观测数据到文件"""
+    def _writer_loop(self):
+        """后台线程：把导出队列中的数据写入文件"""
+        while True:
+            filepath, data = self._write_q.get()
+            try:
+                with open(filepath, 'ab', buffering=_EXPORT_BUFFER_SIZE) as f:
+                    f.writelines(_iter_ndjson_lines(data))
+                self.logger.info("可观测数据已导出到: %s", filepath)
+            except Exception as e:
+                self.logger.error("导出可观测数据失败: %s", e, exc_info=True)
+            finally:
+                self._write_q.task_done()
+
+    def export_to_file(self, filename: Optional[str] = None, wait: bool = False):
+        """
+        导出可观测数据到文件（NDJSON，每行一条记录）
+
+        以追加方式写入：同一文件再次导出时只追加上次导出之后的新追踪/事件，
+        并附带一行当前的指标和统计快照。数据在调用时生成快照，序列化和写文件在后台线程完成。
+
+        Args:
+            filename: 文件名，默认按日期生成
+            wait: 是否等待文件写入完成
+
+        Returns:
+            导出文件路径
+        """
         if filename is None:
-            filename = f"observability_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            filename = f"observability_{datetime.now().strftime('%Y%m%d')}.jsonl"
 
         filepath = self.log_dir / filename
 
-        data = {
-            "exported_at": datetime.now().isoformat(),
-            "traces": self.traces,
-            "events": self.events,
-            "metrics": {k: v for k, v in self.metrics.items()},
-            "statistics": self.get_statistics()
-        }
-
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        with self._flush_lock:
+            self.flush()
+            total_traces = self._merged_traces
+            total_events = self._merged_events
+            exported_traces, exported_events = self._export_cursors.get(filepath, (0, 0))
+            self._export_cursors[filepath] = (total_traces, total_events)
+
+            data = _export_records("trace", _tail_records(self.traces, total_traces - exported_traces))
+            data += _export_records("event", _tail_records(self.events, total_events - exported_events))
+            data.append({
+                "type": "snapshot",
+                "exported_at": datetime.now().isoformat(),
+                "metrics": {k: v.ordered().copy() for k, v in self.metrics.items()},
+                "statistics": self.get_statistics()
+            })
 
-        self.logger.info(f"可观测数据已导出到: {filepath}")
+        self._write_q.put((filepath, data))
+        if wait:
+            self._write_q.join()
         return str(filepath)
 
 
@@ -235,15 +520,14 @@ def trace_execution(span_name: str = None):
         def wrapper(*args, **kwargs):
             obs = ObservabilityManager()
 
-            # 生成trace_id
-            import uuid
-            trace_id = str(uuid.uuid4())[:8]
+            # 生成trace_id，未被采样时后续 span 都会被忽略
+            trace_id = new_id() if obs.sampled() else NOOP_TRACE_ID
 
             # 确定span名称
             name = span_name or func.__name__
 
             # 记录开始
-            start_time = time.time()
+            start_time = time.perf_counter_ns()
             obs.trace(trace_id, f"{name}.start", {
                 "function": func.__name__,
                 "args_count": len(args),
@@ -255,7 +539,7 @@ def trace_execution(span_name: str = None):
                 result = func(*args, **kwargs)
 
                 # 记录成功
-                execution_time = time.time() - start_time
+                execution_time = (time.perf_counter_ns() - start_time) / 1e9
                 obs.trace(trace_id, f"{name}.success", {
                     "execution_time": execution_time
                 })
@@ -264,13 +548,13 @@ def trace_execution(span_name: str = None):
                     "function": func.__name__,
                     "trace_id": trace_id,
                     "execution_time": execution_time
-                })
+                }, trace_id=trace_id)
 
                 return result
 
             except Exception as e:
                 # 记录失败
-                execution_time = time.time() - start_time
+                execution_time = (time.perf_counter_ns() - start_time) / 1e9
                 obs.trace(trace_id, f"{name}.error", {
                     "error": str(e),
                     "execution_time": execution_time
@@ -280,7 +564,7 @@ def trace_execution(span_name: str = None):
                     "trace_id": trace_id,
                     "error": str(e),
                     "execution_time": execution_time
-                })
+                }, trace_id=trace_id)
 
                 raise
 
@@ -306,11 +590,11 @@ def monitor_agent_execution(agent_type: str):
                 "function": func.__name__
             })
 
-            start_time = time.time()
+            start_time = time.perf_counter_ns()
 
             try:
                 result = func(*args, **kwargs)
-                execution_time = time.time() - start_time
+                execution_time = (time.perf_counter_ns() - start_time) / 1e9
 
                 # 记录成功指标
                 obs.record_metric(f"agent.{agent_type}.execution_time", execution_time)
@@ -319,7 +603,7 @@ def monitor_agent_execution(agent_type: str):
                 return result
 
             except Exception as e:
-                execution_time = time.time() - start_time
+                execution_time = (time.perf_counter_ns() - start_time) / 1e9
 
                 # 记录失败指标
                 obs.record_metric(f"agent.{agent_type}.execution_time", execution_time)
@@ -1,5 +1,5 @@
 from .amap_poi_search import amap_poi_search
-from .amap_route_planner import amap_route_planner
+from .amap_route_planner import amap_route_planner, amap_route_plan_many
 from .qq_music_cdp import (
     qq_music_search_cdp, qq_music_play_cdp,
     netease_music_search_cdp, netease_music_play_cdp
@@ -16,6 +16,7 @@ NetEaseMusicPlayToolCDP = netease_music_play_cdp
 __all__ = [
     "amap_poi_search",
     "amap_route_planner",
+    "amap_route_plan_many",
     "qq_music_search_cdp",
     "qq_music_play_cdp",
     "netease_music_search_cdp",
@@ -1,10 +1,16 @@
 import logging
 from langchain.tools import tool
-import requests
+import httpx
 from ..config import AMAP_API_KEY
 
 logger = logging.getLogger(__name__)
 
+# 模块级共享客户端，复用到 restapi.amap.com 的 TCP/TLS 连接
+_client = httpx.Client(
+    timeout=10,
+    limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+)
+
 @tool
 def amap_poi_search(keyword: str, city: str = None) -> str:
     """
@@ -17,7 +23,7 @@ def amap_poi_search(keyword: str, city: str = None) -> str:
     Returns:
         匹配POI的详细信息字符串
     """
-    logger.info(f"POI 搜索: keyword={keyword}, city={city}")
+    logger.info("POI 搜索: keyword=%s, city=%s", keyword, city)
     
     if not AMAP_API_KEY:
         logger.error("未配置 AMAP_API_KEY")
@@ -35,17 +41,17 @@ def amap_poi_search(keyword: str, city: str = None) -> str:
     
     url = "https://restapi.amap.com/v3/place/text"
     try:
-        logger.debug(f"请求高德 API: {url}")
-        resp = requests.get(url, params=params, timeout=10)
+        logger.debug("请求高德 API: %s", url)
+        resp = _client.get(url, params=params)
         data = resp.json()
-        logger.debug(f"API 响应状态: {data.get('status')}")
+        logger.debug("API 响应状态: %s", data.get('status'))
     except Exception as e:
-        logger.error(f"API 请求失败: {e}", exc_info=True)
+        logger.error("API 请求失败: %s", e, exc_info=True)
         return f"请求失败: {e}"
     
     pois = data.get("pois", [])
     if not pois:
-        logger.warning(f"未找到 POI: keyword={keyword}, city={city}")
+        logger.warning("未找到 POI: keyword=%s, city=%s", keyword, city)
         return "未找到结果"
     
     simplified = []
@@ -57,7 +63,7 @@ def amap_poi_search(keyword: str, city: str = None) -> str:
             "type": p.get("type")
         })
     
-    logger.info(f"找到 {len(simplified)} 个 POI")
+    logger.info("找到 %s 个 POI", len(simplified))
     return str(simplified)
 
 # 为了向后兼容，保留类定义
@@ -1,10 +1,143 @@
+import asyncio
+import json
 import logging
+import threading
+import weakref
+from typing import Dict, List
+from cachetools import TTLCache
 from langchain.tools import tool
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from ..config import AMAP_API_KEY
 
+# orjson 序列化速度更快，未安装时回退到标准库 json
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# 模块级共享会话，保持到 restapi.amap.com 的长连接，网关错误时自动重试
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+))
+_SESSION.headers["Accept-Encoding"] = "gzip, deflate"
+
+# 异步共享客户端，供并发路径查询使用；安装 h2 时启用 HTTP/2 多路复用
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+# httpx.AsyncClient 的连接池绑定在首次使用它的事件循环上，跨循环复用会报
+# "Event loop is closed" / "attached to a different loop"，因此每个事件循环各用一个客户端；
+# 事件循环被回收后对应的客户端随之释放
+_ACLIENTS = weakref.WeakKeyDictionary()
+
+
+def _get_aclient() -> httpx.AsyncClient:
+    """返回当前事件循环共享的异步客户端，首次调用时创建"""
+    loop = asyncio.get_running_loop()
+    client = _ACLIENTS.get(loop)
+    if client is None:
+        client = _ACLIENTS[loop] = httpx.AsyncClient(
+            http2=_HTTP2,
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=20),
+        )
+    return client
+
+# 路径规划结果缓存：相同起终点与出行方式在 10 分钟内直接复用
+_ROUTE_CACHE = TTLCache(maxsize=2048, ttl=600)
+_ROUTE_CACHE_LOCK = threading.Lock()
+
+
+# 各出行方式对应的高德接口及附加参数
+_AMAP_ENDPOINTS = {
+    "driving": "https://restapi.amap.com/v5/direction/driving",
+    "walking": "https://restapi.amap.com/v3/direction/walking",
+}
+# 只请求用到的字段：v5 驾车默认不返回耗时，需通过 show_fields=cost 获取
+_AMAP_EXTRA_PARAMS = {
+    "driving": {"strategy": "32", "show_fields": "cost"},
+    "walking": {"extensions": "base"},
+}
+
+
+def _round_coord(coord: str) -> str:
+    """将 'lng,lat' 坐标统一保留 5 位小数，提高缓存命中率；无法解析时原样返回"""
+    try:
+        lng, lat = coord.split(",")
+        return f"{float(lng):.5f},{float(lat):.5f}"
+    except ValueError:
+        return coord.strip()
+
+def _prepare_request(origin: str, destination: str, mode: str):
+    """校验出行方式并构造缓存键、请求地址与参数"""
+    if mode not in _AMAP_ENDPOINTS:  # transit需要更复杂参数，这里先限制
+        logger.warning("不支持的模式 %s，使用 driving", mode)
+        mode = "driving"
+    
+    key = (_round_coord(origin), _round_coord(destination), mode)
+    url = _AMAP_ENDPOINTS[mode]
+    params = {"key": AMAP_API_KEY, "origin": origin, "destination": destination}
+    params.update(_AMAP_EXTRA_PARAMS[mode])
+    return mode, key, url, params
+
+
+def _loads(content: bytes):
+    """解析高德响应体，优先使用 orjson"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _get_cached(key):
+    with _ROUTE_CACHE_LOCK:
+        cached = _ROUTE_CACHE.get(key)
+    if cached is not None:
+        logger.debug("路径规划缓存命中: %s", key)
+    return cached
+
+
+def _parse_route(data: dict, mode: str, origin: str, destination: str, key) -> str:
+    """从高德响应中提取首条路径的距离、耗时与步骤，成功结果写入缓存"""
+    # Simplify response
+    routes = data.get("route", {}).get("paths") or []
+    
+    if not routes:
+        logger.warning("未找到路径: origin=%s, destination=%s", origin, destination)
+        return "未找到路径"
+    
+    path = routes[0]
+    steps = path.get("steps", [])
+    simplified_steps = [s.get("instruction") for s in steps if s.get("instruction")]
+    
+    result = {
+        "mode": mode,
+        "distance_m": path.get("distance"),
+        # v5 驾车耗时位于 cost.duration，v3 步行直接在 path 上
+        "duration_s": path.get("duration") or path.get("cost", {}).get("duration"),
+        "steps": simplified_steps[:10],
+    }
+    
+    logger.info("找到路径: distance=%sm, duration=%ss", result['distance_m'], result['duration_s'])
+    # 输出紧凑 JSON，便于下游解析并减少 LLM token 消耗
+    if orjson is not None:
+        result = orjson.dumps(result).decode()
+    else:
+        result = json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+    with _ROUTE_CACHE_LOCK:
+        _ROUTE_CACHE[key] = result
+    return result
+
 @tool
 def amap_route_planner(origin: str, destination: str, mode: str = "driving") -> str:
     """
@@ -18,65 +151,124 @@ def amap_route_planner(origin: str, destination: str, mode: str = "driving") ->
     Returns:
         路径规划结果字符串
     """
-    logger.info(f"路径规划: origin={origin}, destination={destination}, mode={mode}")
+    logger.info("路径规划: origin=%s, destination=%s, mode=%s", origin, destination, mode)
     
     if not AMAP_API_KEY:
         logger.error("未配置 AMAP_API_KEY")
         return "错误: 未配置AMAP_API_KEY"
     
-    if mode not in {"driving", "walking"}:  # transit需要更复杂参数，这里先限制
-        logger.warning(f"不支持的模式 {mode}，使用 driving")
-        mode = "driving"
+    mode, key, url, params = _prepare_request(origin, destination, mode)
+    cached = _get_cached(key)
+    if cached is not None:
+        return cached
+    
+    try:
+        logger.debug("请求高德 API: %s", url)
+        resp = _SESSION.get(url, params=params, timeout=(3.05, 10))
+        data = _loads(resp.content)
+        logger.debug("API 响应状态: %s", data.get('status'))
+    except Exception as e:
+        logger.error("API 请求失败: %s", e, exc_info=True)
+        return f"请求失败: {e}"
+    
+    return _parse_route(data, mode, origin, destination, key)
+
+
+async def amap_route_planner_async(origin: str, destination: str, mode: str = "driving") -> str:
+    """amap_route_planner 的异步版本，基于当前事件循环共享的 httpx.AsyncClient，可与其他查询并发执行"""
+    logger.info("异步路径规划: origin=%s, destination=%s, mode=%s", origin, destination, mode)
+    
+    if not AMAP_API_KEY:
+        logger.error("未配置 AMAP_API_KEY")
+        return "错误: 未配置AMAP_API_KEY"
     
-    if mode == "driving":
-        url = "https://restapi.amap.com/v5/direction/driving"
-        params = {
-            "key": AMAP_API_KEY,
-            "origin": origin,
-            "destination": destination,
-        }
-    else:  # walking
-        url = "https://restapi.amap.com/v3/direction/walking"
-        params = {
-            "key": AMAP_API_KEY,
-            "origin": origin,
-            "destination": destination,
-        }
+    mode, key, url, params = _prepare_request(origin, destination, mode)
+    cached = _get_cached(key)
+    if cached is not None:
+        return cached
     
     try:
-        logger.debug(f"请求高德 API: {url}")
-        resp = requests.get(url, params=params, timeout=10)
-        data = resp.json()
-        logger.debug(f"API 响应状态: {data.get('status')}")
+        logger.debug("请求高德 API: %s", url)
+        resp = await _get_aclient().get(url, params=params)
+        data = _loads(resp.content)
+        logger.debug("API 响应状态: %s", data.get('status'))
     except Exception as e:
-        logger.error(f"API 请求失败: {e}", exc_info=True)
+        logger.error("API 请求失败: %s", e, exc_info=True)
         return f"请求失败: {e}"
     
-    # Simplify response
-    if mode == "driving":
-        routes = data.get("route", {}).get("paths", [])
-    else:
-        routes = data.get("route", {}).get("paths", [])
+    return _parse_route(data, mode, origin, destination, key)
+
+
+async def amap_plan_many(pairs):
+    """
+    并发执行多条路径规划查询。
     
-    if not routes:
-        logger.warning(f"未找到路径: origin={origin}, destination={destination}")
-        return "未找到路径"
+    Args:
+        pairs: (origin, destination[, mode]) 元组序列
     
-    path = routes[0]
-    distance = path.get("distance")
-    duration = path.get("duration")
-    steps = path.get("steps", [])
-    simplified_steps = [s.get("instruction") for s in steps if s.get("instruction")]
+    Returns:
+        与 pairs 顺序一致的结果字符串列表
+    """
+    return await asyncio.gather(*(amap_route_planner_async(*p) for p in pairs))
+
+
+def _format_batch(legs: List[Dict[str, str]], results) -> str:
+    """将批量规划结果整理为 JSON 列表，单条失败不影响其他结果"""
+    items = []
+    for leg, res in zip(legs, results):
+        item = {"origin": leg.get("origin"), "destination": leg.get("destination")}
+        if isinstance(res, Exception):
+            item["error"] = f"请求失败: {res}"
+        else:
+            try:
+                item.update(_loads(res))
+            except ValueError:
+                item["error"] = res
+        items.append(item)
+    if orjson is not None:
+        return orjson.dumps(items).decode()
+    return json.dumps(items, ensure_ascii=False, separators=(",", ":"))
+
+
+@tool
+def amap_route_plan_many(legs: List[Dict[str, str]]) -> str:
+    """
+    批量路径规划：一次提交多段起终点（如多站行程、驾车与步行对比），并发查询高德并返回全部结果。
     
-    result = {
-        "mode": mode,
-        "distance_m": distance,
-        "duration_s": duration,
-        "steps": simplified_steps[:10],
-    }
+    Args:
+        legs: 路段列表，每项为 {"origin": 'lng,lat', "destination": 'lng,lat', "mode": driving|walking}，mode 可省略
     
-    logger.info(f"找到路径: distance={distance}m, duration={duration}s")
-    return str(result)
+    Returns:
+        与 legs 顺序一致的 JSON 列表
+    """
+    logger.info("批量路径规划: %s 段", len(legs))
+    results = []
+    for leg in legs:
+        try:
+            results.append(amap_route_planner.func(**leg))
+        except Exception as e:
+            results.append(e)
+    return _format_batch(legs, results)
+
+
+async def amap_route_plan_many_async(legs: List[Dict[str, str]]) -> str:
+    """amap_route_plan_many 的异步版本，各路段通过 asyncio.gather 并发请求"""
+    logger.info("异步批量路径规划: %s 段", len(legs))
+
+    async def _plan_leg(leg):
+        # 参数错误（缺少或多余的键）在调用时就会抛出 TypeError，同样按单段失败处理，与同步版本一致
+        try:
+            return await amap_route_planner_async(**leg)
+        except Exception as e:
+            return e
+
+    results = await asyncio.gather(*(_plan_leg(leg) for leg in legs))
+    return _format_batch(legs, results)
+
+
+# 异步调用（ainvoke / astream_events）时直接走 httpx 异步客户端，不再占用线程池
+amap_route_planner.coroutine = amap_route_planner_async
+amap_route_plan_many.coroutine = amap_route_plan_many_async
 
 # 为了向后兼容，保留类定义
 class AmapRoutePlannerTool:
@@ -84,4 +276,4 @@ class AmapRoutePlannerTool:
         return amap_route_planner
 
     async def _arun(self, *args, **kwargs):  # pragma: no cover
-        raise NotImplementedError("amap_route_planner 不支持异步")
+        return await amap_route_planner_async(*args, **kwargs)
@@ -4,23 +4,153 @@ Multi-platform music tools using direct Chrome DevTools Protocol.
 This module provides tools to control multiple music platforms (QQ Music, NetEase Music) via direct CDP connection.
 """
 
+import functools
 import logging
+import threading
 import time
 import json
 from langchain.tools import tool
 import pychrome
+import requests
 from abc import ABC, abstractmethod
+from cachetools import TTLCache
 from typing import Optional, Dict, Any
 import urllib.parse
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+DEVTOOLS_URL = "http://localhost:9222"
+
+# Serializes browser startup so concurrent tool calls never launch two Chrome processes
+_START_LOCK = threading.Lock()
+
+
+def _devtools_ready() -> bool:
+    """Return True if a Chrome DevTools endpoint is answering on DEVTOOLS_URL"""
+    try:
+        requests.get(f"{DEVTOOLS_URL}/json/version", timeout=0.5)
+        return True
+    except requests.RequestException:
+        return False
+
 # Music platform URLs
 MUSIC_PLATFORMS = {
     "qq": "https://y.qq.com/",
     "netease": "https://music.163.com/"
 }
 
+# Search URL templates (observed patterns; sites may change). NetEase uses hash routing
+# and expects percent-encoding (spaces -> %20), QQ accepts form encoding.
+QQ_SEARCH_URL = "https://y.qq.com/n/ryqq/search?w={query}&t=song&remoteplace=txt.yqq.top"
+NETEASE_SEARCH_URL = "https://music.163.com/#/search/m/?s={query}"
+
+
+# Page-world helpers installed once per tab via Page.addScriptToEvaluateOnNewDocument.
+# Tools then call e.g. `__ivi.qqFindFirst()` instead of shipping the script on every call.
+_IVI_HELPERS_JS = """
+window.__ivi = window.__ivi || (function(){
+    // NetEase renders results inside an iframe #g_iframe
+    function neteaseDoc(){
+        const iframe = document.getElementById('g_iframe');
+        return iframe ? (iframe.contentDocument || iframe.contentWindow.document) : document;
+    }
+    function click(btn){
+        try { btn.click(); return {clicked: true}; } catch(e) { return {clicked: false, err: e.toString()}; }
+    }
+    return {
+        hasContent: function(selector){
+            try { return neteaseDoc().querySelectorAll(selector).length > 0; } catch(e) { return false; }
+        },
+        qqFindFirst: function(){
+            const songs = document.querySelectorAll('.songlist__item, .song_item, .song-list-item, [data-songid]');
+            if (songs.length > 0){
+                const s = songs[0];
+                // attempt to pick a text node
+                return {title: s.innerText || s.textContent || s.outerHTML.substring(0,200)};
+            }
+            // fallback selectors
+            const list = document.querySelectorAll('.songlist__item__name, .songlist__songname');
+            if (list.length > 0) return {title: list[0].innerText || list[0].textContent};
+            return null;
+        },
+        // QQ structure: .songlist__item > .songlist__songname > .mod_list_menu > .list_menu__item.list_menu__play
+        qqPlayFirst: function(){
+            const first = document.querySelector('.songlist__item');
+            const playBtn = first && first.querySelector('.list_menu__item.list_menu__play');
+            return playBtn ? click(playBtn) : {clicked: false};
+        },
+        qqFindAndPlay: function(){
+            const first = document.querySelector('.songlist__item');
+            if (!first) return null;
+            const title = first.innerText || first.textContent || '';
+            const playBtn = first.querySelector('.list_menu__item.list_menu__play');
+            if (!playBtn) return {title: title, clicked: false};
+            return Object.assign({title: title}, click(playBtn));
+        },
+        // First song item is in .srchsongst > .item; title is in .item > .td.w0 > .sn > .text > a > b
+        neteaseFindFirst: function(){
+            try {
+                const first = neteaseDoc().querySelector('.srchsongst .item');
+                const titleElem = first && first.querySelector('.sn .text a b, .sn .text a');
+                if (titleElem) return {title: titleElem.innerText || titleElem.textContent};
+            } catch(e) {}
+            return null;
+        },
+        // Play button: .srchsongst > .item > .td > .hd > a.ply[data-res-action="play"]
+        neteasePlayFirst: function(){
+            const first = neteaseDoc().querySelector('.srchsongst .item');
+            const playBtn = first && first.querySelector('a.ply[data-res-action="play"]');
+            return playBtn ? click(playBtn) : {clicked: false};
+        },
+        neteaseFindAndPlay: function(){
+            try {
+                const first = neteaseDoc().querySelector('.srchsongst .item');
+                if (!first) return null;
+                const titleElem = first.querySelector('.sn .text a b, .sn .text a');
+                const title = titleElem ? (titleElem.innerText || titleElem.textContent) : '';
+                const playBtn = first.querySelector('a.ply[data-res-action="play"]');
+                if (!playBtn) return {title: title, clicked: false};
+                return Object.assign({title: title}, click(playBtn));
+            } catch(e) {
+                return null;
+            }
+        }
+    };
+})();
+"""
+
+
+def _cdp_value(res: Optional[Dict[str, Any]], field: Optional[str] = None) -> Any:
+    """Return result.value (or result.value[field]) from a CDP response, None if absent"""
+    try:
+        value = res["result"]["value"]
+        return value if field is None else value[field]
+    except (KeyError, TypeError):
+        return None
+
+
+def _tool_result(status: str, message: str, **fields) -> str:
+    """Serialize a tool result as JSON; `message` keeps the user-facing Chinese text"""
+    data = {"status": status, **fields, "message": message}
+    if orjson is not None:
+        return orjson.dumps(data).decode()
+    return json.dumps(data, ensure_ascii=False)
+
+
+@functools.lru_cache(maxsize=1024)
+def _quote_plus(text: str) -> str:
+    return urllib.parse.quote_plus(text)
+
+
+@functools.lru_cache(maxsize=1024)
+def _quote(text: str) -> str:
+    return urllib.parse.quote(text, safe='')
+
 class MusicPlatformController(ABC):
     """Abstract base class for music platform controllers"""
 
@@ -29,6 +159,14 @@ class MusicPlatformController(ABC):
         self.base_url = base_url
         self.browser = None
         self.tab = None
+        # Last URL successfully loaded in the tab; lets tools skip redundant navigation
+        self.current_url = None
+        # True when the last navigate_url was a same-document (hash route) navigation
+        self.same_document_nav = False
+        # Set from pychrome's event thread when the top document / a child frame finishes loading
+        self._loaded_evt = threading.Event()
+        self._frame_evt = threading.Event()
+        self._child_frames = set()
 
     def start_browser(self):
         """Start Chrome browser with remote debugging"""
@@ -36,6 +174,10 @@ class MusicPlatformController(ABC):
             import subprocess
             import os
 
+            if _devtools_ready():
+                logger.info("Reusing Chrome already listening on port 9222")
+                return self._connect()
+
             chrome_path = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
             if not os.path.exists(chrome_path):
                 chrome_path = r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe"
@@ -55,62 +197,112 @@ class MusicPlatformController(ABC):
             logger.info("Starting Chrome browser...")
             subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
-            # Wait for Chrome to start
-            time.sleep(3)
+            # Wait for the DevTools endpoint with exponential backoff
+            for delay in (0.05, 0.1, 0.2, 0.4, 0.8, 1.6):
+                if _devtools_ready():
+                    break
+                time.sleep(delay)
 
-            # Connect to Chrome
-            self.browser = pychrome.Browser(url="http://localhost:9222")
-            self.tab = self.browser.new_tab()
-
-            logger.info("Chrome browser started and connected")
-            return True
+            return self._connect()
 
         except Exception as e:
-            logger.error(f"Failed to start browser: {e}")
+            logger.error("Failed to start browser: %s", e)
             return False
 
+    def ensure_started(self) -> bool:
+        """Start the browser on first use; concurrent callers wait for the same startup"""
+        if self.tab is not None:
+            return True
+        with _START_LOCK:
+            if self.tab is None:
+                return self.start_browser()
+            return True
+
+    def _connect(self) -> bool:
+        """Connect to Chrome and open a tab with Page events enabled"""
+        # Publish browser/tab only once the tab is fully set up: ensure_started's unlocked
+        # fast path treats a non-None tab as ready, and a failure here must leave it None to retry
+        browser = pychrome.Browser(url=DEVTOOLS_URL)
+        tab = browser.new_tab()
+        try:
+            self._enable_page_events(tab)
+        except Exception:
+            try:
+                browser.close_tab(tab)  # also stops the tab if it was started
+            except Exception as e:
+                logger.debug("close_tab after failed setup: %s", e)
+            raise
+        self.browser = browser
+        self.tab = tab
+
+        logger.info("Chrome browser started and connected")
+        return True
+
+    def _enable_page_events(self, tab):
+        """Subscribe to CDP Page events and install the __ivi helpers for every new document."""
+        tab.start()
+        tab.Page.loadEventFired = lambda **kw: self._loaded_evt.set()
+        tab.Page.frameAttached = self._on_frame_attached
+        tab.Page.frameStoppedLoading = self._on_frame_stopped_loading
+        tab.Page.enable()
+        tab.Page.addScriptToEvaluateOnNewDocument(source=_IVI_HELPERS_JS)
+
+    def _on_frame_attached(self, **kw):
+        if kw.get("parentFrameId"):
+            self._child_frames.add(kw.get("frameId"))
+
+    def _on_frame_stopped_loading(self, **kw):
+        if kw.get("frameId") in self._child_frames:
+            self._frame_evt.set()
+
     def wait_for_ready(self, timeout: int = 10) -> bool:
-        """Wait until document.readyState becomes 'interactive' or 'complete'."""
+        """Wait for Page.loadEventFired, then confirm document.readyState once."""
+        self._loaded_evt.wait(timeout)
         try:
-            start = time.time()
-            while time.time() - start < timeout:
-                try:
-                    res = self.tab.call_method("Runtime.evaluate", expression="document.readyState", returnByValue=True)
-                    state = res.get('result', {}).get('value')
-                    if state in ("interactive", "complete"):
-                        return True
-                except Exception:
-                    # sometimes Runtime isn't ready yet
-                    pass
-                time.sleep(0.4)
+            res = self.tab.call_method("Runtime.evaluate", expression="document.readyState", returnByValue=True)
+            state = _cdp_value(res)
+            return state in ("interactive", "complete")
         except Exception as e:
-            logger.debug(f"wait_for_ready error: {e}")
-        return False
+            logger.debug("wait_for_ready error: %s", e)
+            return False
+
+    def wait_for_frame_reload(self, timeout: int = 12) -> bool:
+        """Wait for a child frame to stop loading after the last navigate_url (which clears the event)."""
+        reloaded = self._frame_evt.wait(timeout)
+        self._frame_evt.clear()
+        return reloaded
 
     def wait_for_iframe_content(self, selector: str, timeout: int = 12) -> bool:
-        """Wait until the iframe (#g_iframe) or top-level document contains elements matching selector."""
+        """Wait until the iframe (#g_iframe) or top-level document contains elements matching selector.
+
+        Re-checks immediately when a child frame stops loading; results rendered later by
+        script are still picked up by the fallback re-checks, which back off from 50 ms to 500 ms.
+        """
         start = time.time()
-        while time.time() - start < timeout:
+        delay = 0.05
+        while True:
             try:
-                check = f"""
-                (function(){{
-                    const iframe = document.getElementById('g_iframe');
-                    try{{
-                        const doc = iframe ? (iframe.contentDocument || iframe.contentWindow.document) : document;
-                        return doc.querySelectorAll('{selector}').length>0;
-                    }}catch(e){{
-                        return false;
-                    }}
-                }})();
-                """
-                res = self.tab.call_method("Runtime.evaluate", expression=check, returnByValue=True)
-                val = res.get('result', {}).get('value')
+                res = self._call_helper("hasContent", selector)
+                val = _cdp_value(res)
                 if val:
                     return True
             except Exception:
                 pass
-            time.sleep(0.6)
-        return False
+            remaining = timeout - (time.time() - start)
+            if remaining <= 0:
+                return False
+            if self._frame_evt.wait(min(remaining, delay)):
+                self._frame_evt.clear()
+            delay = min(delay * 1.7, 0.5)
+
+    def _call_helper(self, name: str, *args) -> Dict[str, Any]:
+        """Call a window.__ivi helper, installing the helpers first if this document predates them."""
+        expression = f"__ivi.{name}({', '.join(json.dumps(a) for a in args)})"
+        res = self.tab.call_method("Runtime.evaluate", expression=expression, returnByValue=True)
+        if res and res.get("exceptionDetails"):
+            self.tab.call_method("Runtime.evaluate", expression=_IVI_HELPERS_JS)
+            res = self.tab.call_method("Runtime.evaluate", expression=expression, returnByValue=True)
+        return res
 
     def navigate_url(self, url: str, timeout: int = 10) -> bool:
         """Navigate to a URL and wait until page is ready."""
@@ -122,14 +314,19 @@ class MusicPlatformController(ABC):
                 # already started or cannot start; ignore
                 pass
 
-            self.tab.call_method("Page.navigate", url=url)
-            # wait for ready state
-            self.wait_for_ready(timeout=timeout)
-            # small extra wait for dynamic content
-            time.sleep(1)
+            self._loaded_evt.clear()
+            self._frame_evt.clear()
+            res = self.tab.call_method("Page.navigate", url=url)
+            # Same-document (hash route) navigations have no loaderId and fire no load event;
+            # callers that render into a child frame wait for it via wait_for_frame_reload()
+            self.same_document_nav = not (res and res.get("loaderId"))
+            if not self.same_document_nav:
+                self.wait_for_ready(timeout=timeout)
+            self.current_url = url
             return True
         except Exception as e:
-            logger.error(f"navigate_url failed: {e}")
+            logger.error("navigate_url failed: %s", e)
+            self.current_url = None
             return False
 
     def navigate_to_platform(self):
@@ -137,7 +334,7 @@ class MusicPlatformController(ABC):
         try:
             return self.navigate_url(self.base_url, timeout=12)
         except Exception as e:
-            logger.error(f"Failed to navigate to {self.platform_name}: {e}")
+            logger.error("Failed to navigate to %s: %s", self.platform_name, e)
             return False
 
     @abstractmethod
@@ -150,6 +347,11 @@ class MusicPlatformController(ABC):
         """Play the found song - platform specific implementation"""
         pass
 
+    @abstractmethod
+    def find_and_play(self, song_name: str) -> Optional[Dict[str, Any]]:
+        """Search and click play on the first result in one evaluation, returning {title, clicked}"""
+        pass
+
     def close(self):
         """Close browser"""
         try:
@@ -159,7 +361,7 @@ class MusicPlatformController(ABC):
                 self.browser.close()
             logger.info("Browser closed")
         except Exception as e:
-            logger.error(f"Error closing browser: {e}")
+            logger.error("Error closing browser: %s", e)
 
 class QQMusicController(MusicPlatformController):
     """QQ Music browser controller"""
@@ -167,47 +369,41 @@ class QQMusicController(MusicPlatformController):
     def __init__(self):
         super().__init__("QQ Music", MUSIC_PLATFORMS["qq"])
 
+    def _load_search_page(self, song_name: str) -> bool:
+        """Open the QQ Music search results page for song_name"""
+        # Use QQ Music search URL to avoid interacting with dynamic inputs
+        search_url = QQ_SEARCH_URL.format(query=_quote_plus(song_name))
+        if self.current_url == search_url:
+            # The tab already shows this result list (e.g. search followed by play)
+            return True
+        logger.debug("Navigating to QQ search url: %s", search_url)
+        if not self.navigate_url(search_url, timeout=12):
+            logger.error("Failed to load QQ search page")
+            return False
+
+        # Wait a bit for results to render
+        time.sleep(1.5)
+        return True
+
     def search_song(self, song_name: str) -> Optional[Dict[str, Any]]:
         """Search for a song on QQ Music"""
         try:
-            # Use QQ Music search URL to avoid interacting with dynamic inputs
-            query = urllib.parse.quote_plus(song_name)
-            # QQ search URL pattern (site may change; this is current observed pattern)
-            search_url = f"https://y.qq.com/n/ryqq/search?w={query}&t=song&remoteplace=txt.yqq.top"
-            logger.debug(f"Navigating to QQ search url: {search_url}")
-            if not self.navigate_url(search_url, timeout=12):
-                logger.error("Failed to load QQ search page")
+            if not self._load_search_page(song_name):
                 return None
 
-            # Wait a bit for results to render
-            time.sleep(1.5)
-
             # Try to extract first song title from DOM
-            result = self.tab.call_method("Runtime.evaluate", expression="""
-                (function(){
-                    const songs = document.querySelectorAll('.songlist__item, .song_item, .song-list-item, [data-songid]');
-                    if (songs.length>0){
-                        const s = songs[0];
-                        // attempt to pick a text node
-                        return {title: s.innerText || s.textContent || s.outerHTML.substring(0,200)};
-                    }
-                    // fallback selectors
-                    const list = document.querySelectorAll('.songlist__item__name, .songlist__songname');
-                    if (list.length>0) return {title: list[0].innerText || list[0].textContent};
-                    return null;
-                })();
-            """, returnByValue=True)
-
-            song_info = result.get('result', {}).get('value') if result else None
+            result = self._call_helper("qqFindFirst")
+
+            song_info = _cdp_value(result)
             if song_info:
-                logger.info(f"Found song: {song_info.get('title')}")
+                logger.info("Found song: %s", song_info.get('title'))
                 return {"title": song_info.get('title')}
             else:
                 logger.warning("No songs found on QQ")
                 return None
 
         except Exception as e:
-            logger.error(f"Search failed: {e}")
+            logger.error("Search failed: %s", e)
             return None
 
     def play_song(self, song_info: Dict[str, Any]) -> str:
@@ -215,28 +411,9 @@ class QQMusicController(MusicPlatformController):
         try:
             # Click the play button (播放) within the first song item
             # QQ structure: .songlist__item > .songlist__songname > .mod_list_menu > .list_menu__item.list_menu__play
-            click_res = self.tab.call_method("Runtime.evaluate", expression="""
-                (function(){
-                    // Find the first song item and click its play button
-                    const items = document.querySelectorAll('.songlist__item');
-                    if (items && items.length > 0) {
-                        const first = items[0];
-                        // Find the play button within this item
-                        const playBtn = first.querySelector('.list_menu__item.list_menu__play');
-                        if (playBtn) {
-                            try { 
-                                playBtn.click(); 
-                                return {clicked: true}; 
-                            } catch(e) {
-                                return {clicked: false, err: e.toString()};
-                            }
-                        }
-                    }
-                    return {clicked: false};
-                })();
-            """, returnByValue=True)
-
-            clicked = click_res.get('result', {}).get('value', {}).get('clicked') if click_res else False
+            click_res = self._call_helper("qqPlayFirst")
+
+            clicked = _cdp_value(click_res, 'clicked')
             if clicked:
                 logger.info("Clicked play button on QQ")
                 return "歌曲开始播放"
@@ -245,96 +422,86 @@ class QQMusicController(MusicPlatformController):
                 return "找到歌曲但无法播放"
 
         except Exception as e:
-            logger.error(f"Play failed: {e}")
+            logger.error("Play failed: %s", e)
             return f"播放失败: {e}"
 
+    def find_and_play(self, song_name: str) -> Optional[Dict[str, Any]]:
+        """Locate the first QQ search result and click its play button in a single evaluation"""
+        try:
+            if not self._load_search_page(song_name):
+                return None
+
+            result = self._call_helper("qqFindAndPlay")
+
+            info = _cdp_value(result)
+            if not info:
+                logger.warning("No songs found on QQ")
+                return None
+            logger.info("Found song: %s, clicked=%s", info.get('title'), info.get('clicked'))
+            return {"title": info.get('title'), "clicked": bool(info.get('clicked'))}
+
+        except Exception as e:
+            logger.error("Find and play failed: %s", e)
+            return None
+
 class NetEaseMusicController(MusicPlatformController):
     """NetEase Music browser controller"""
 
     def __init__(self):
         super().__init__("NetEase Music", MUSIC_PLATFORMS["netease"])
 
+    def _load_search_page(self, song_name: str) -> bool:
+        """Open the NetEase search results page and wait for the result list inside #g_iframe"""
+        # Use NetEase search URL (site uses hash routing)
+        search_url = NETEASE_SEARCH_URL.format(query=_quote(song_name))
+        if self.current_url == search_url:
+            # The tab already shows this result list (e.g. search followed by play)
+            return True
+        logger.debug("Navigating to NetEase search url: %s", search_url)
+        if not self.navigate_url(search_url, timeout=12):
+            logger.error("Failed to load NetEase search page")
+            return False
+
+        # A hash-route search keeps the top document, and #g_iframe still shows the previous
+        # query's list until the router reloads it; wait for that reload before probing
+        if self.same_document_nav and not self.wait_for_frame_reload(timeout=12):
+            logger.debug('g_iframe did not reload after hash navigation')
+
+        # Wait for results to render inside iframe
+        # wait for common item selectors inside iframe (give a bit longer)
+        if not self.wait_for_iframe_content('.srchsongst .item', timeout=12):
+            logger.debug('No list items detected in iframe after wait')
+            # still continue to try extracting fallback selectors
+        return True
+
     def search_song(self, song_name: str) -> Optional[Dict[str, Any]]:
         """Search for a song on NetEase Music"""
         try:
-            # Use NetEase search URL (site uses hash routing)
-            # Use percent-encoding (spaces -> %20) to match NetEase URL pattern
-            query = urllib.parse.quote(song_name, safe='')
-            # NetEase search URL pattern observed: https://music.163.com/#/search/m/?s=<query>
-            search_url = f"https://music.163.com/#/search/m/?s={query}"
-            logger.debug(f"Navigating to NetEase search url: {search_url}")
-            if not self.navigate_url(search_url, timeout=12):
-                logger.error("Failed to load NetEase search page")
+            if not self._load_search_page(song_name):
                 return None
 
-            # Wait for results to render inside iframe
-            # wait for common item selectors inside iframe (give a bit longer)
-            if not self.wait_for_iframe_content('.srchsongst .item', timeout=12):
-                logger.debug('No list items detected in iframe after wait')
-                # still continue to try extracting fallback selectors
-
             # Extract title from results
-            result = self.tab.call_method("Runtime.evaluate", expression="""
-                (function(){
-                    // NetEase renders results inside an iframe #g_iframe
-                    const iframe = document.getElementById('g_iframe');
-                    try{
-                        const doc = iframe ? iframe.contentDocument || iframe.contentWindow.document : document;
-                        // First song item is in .srchsongst > .item; song title is in .item > .td.w0 > .sn > .text > a > b
-                        const items = doc.querySelectorAll('.srchsongst .item');
-                        if (items && items.length>0) {
-                            const first = items[0];
-                            const titleElem = first.querySelector('.sn .text a b, .sn .text a');
-                            if (titleElem) return {title: titleElem.innerText || titleElem.textContent};
-                        }
-                    }catch(e){}
-                    return null;
-                })();
-            """, returnByValue=True)
-
-            song_info = result.get('result', {}).get('value') if result else None
+            result = self._call_helper("neteaseFindFirst")
+
+            song_info = _cdp_value(result)
             if song_info:
-                logger.info(f"Found song on NetEase: {song_info.get('title')}")
+                logger.info("Found song on NetEase: %s", song_info.get('title'))
                 return {"title": song_info.get('title')}
             else:
                 logger.warning("No songs found on NetEase")
                 return None
 
         except Exception as e:
-            logger.error(f"Search failed: {e}")
+            logger.error("Search failed: %s", e)
             return None
 
     def play_song(self, song_info: Dict[str, Any]) -> str:
         """Play the found song"""
         try:
-            # NetEase song list renders inside #g_iframe.
-            # DOM structure: .srchsongst > .item (song row) > .td > .hd > a.ply (play button)
-            # where a.ply has data-res-action="play"
-            script = '''(function(){
-                const iframe = document.getElementById('g_iframe');
-                const doc = iframe ? (iframe.contentDocument || iframe.contentWindow.document) : document;
-                
-                // Find first song item with play button
-                const items = doc.querySelectorAll('.srchsongst .item');
-                if (items && items.length > 0) {
-                    const first = items[0];
-                    const playBtn = first.querySelector('a.ply[data-res-action="play"]');
-                    if (playBtn) {
-                        try {
-                            playBtn.click();
-                            return { clicked: true };
-                        } catch (e) {
-                            return { clicked: false, err: e.toString() };
-                        }
-                    }
-                }
-                return { clicked: false };
-            })();'''
-
             # wait for list to appear before attempting click
             self.wait_for_iframe_content('.srchsongst .item', timeout=12)
-            click_res = self.tab.call_method("Runtime.evaluate", expression=script, returnByValue=True)
-            clicked = click_res.get('result',{}).get('value',{}).get('clicked') if click_res else False
+            click_res = self._call_helper("neteasePlayFirst")
+            clicked = _cdp_value(click_res, 'clicked')
             if clicked:
                 logger.info("Clicked play button on NetEase")
                 time.sleep(1.2)
@@ -344,35 +511,63 @@ class NetEaseMusicController(MusicPlatformController):
                 return "无法选择歌曲"
 
         except Exception as e:
-            logger.error(f"Play failed: {e}")
+            logger.error("Play failed: %s", e)
             return f"播放失败: {e}"
-            click_res = self.tab.call_method("Runtime.evaluate", expression=script, returnByValue=True)
-            clicked = click_res.get('result',{}).get('value',{}).get('clicked') if click_res else False
-            if clicked:
-                logger.info("Clicked play button on NetEase")
+
+    def find_and_play(self, song_name: str) -> Optional[Dict[str, Any]]:
+        """Locate the first NetEase search result and click its play button in a single evaluation"""
+        try:
+            if not self._load_search_page(song_name):
+                return None
+
+            result = self._call_helper("neteaseFindAndPlay")
+
+            info = _cdp_value(result)
+            if not info:
+                logger.warning("No songs found on NetEase")
+                return None
+            logger.info("Found song on NetEase: %s, clicked=%s", info.get('title'), info.get('clicked'))
+            if info.get('clicked'):
                 time.sleep(1.2)
-                return "歌曲开始播放"
-            else:
-                logger.error("Could not click on first NetEase search result")
-                return "无法选择歌曲"
+            return {"title": info.get('title'), "clicked": bool(info.get('clicked'))}
 
         except Exception as e:
-            logger.error(f"Play failed: {e}")
-            return f"播放失败: {e}"
+            logger.error("Find and play failed: %s", e)
+            return None
 
 # Global controller instances
 _controllers = {}
+_controllers_lock = threading.Lock()
+
+# Recent search results keyed by (normalized song name, platform): first result title
+_SEARCH_CACHE = TTLCache(maxsize=512, ttl=1800)
+_SEARCH_CACHE_LOCK = threading.Lock()
+
+
+def _search_cache_key(song_name: str, platform: str):
+    return song_name.strip().lower(), platform
+
+
+def _get_cached_search(song_name: str, platform: str) -> Optional[str]:
+    with _SEARCH_CACHE_LOCK:
+        return _SEARCH_CACHE.get(_search_cache_key(song_name, platform))
+
+
+def _cache_search(song_name: str, platform: str, title: str):
+    with _SEARCH_CACHE_LOCK:
+        _SEARCH_CACHE[_search_cache_key(song_name, platform)] = title
 
 def get_controller(platform: str) -> MusicPlatformController:
     """Get or create music platform controller"""
-    if platform not in _controllers:
-        if platform == "qq":
-            _controllers[platform] = QQMusicController()
-        elif platform == "netease":
-            _controllers[platform] = NetEaseMusicController()
-        else:
-            raise ValueError(f"Unsupported platform: {platform}")
-    return _controllers[platform]
+    with _controllers_lock:
+        if platform not in _controllers:
+            if platform == "qq":
+                _controllers[platform] = QQMusicController()
+            elif platform == "netease":
+                _controllers[platform] = NetEaseMusicController()
+            else:
+                raise ValueError(f"Unsupported platform: {platform}")
+        return _controllers[platform]
 
 @tool
 def qq_music_search_cdp(song_name: str) -> str:
@@ -385,26 +580,32 @@ def qq_music_search_cdp(song_name: str) -> str:
     Returns:
         搜索结果信息
     """
-    logger.info(f"开始搜索QQ音乐歌曲: {song_name}")
+    logger.info("开始搜索QQ音乐歌曲: %s", song_name)
+
+    cached = _get_cached_search(song_name, "qq")
+    if cached:
+        return _tool_result("found", f"找到歌曲: {cached}", title=cached)
 
     controller = get_controller("qq")
 
     # Start browser if not started
-    if not controller.browser:
-        if not controller.start_browser():
-            return "无法启动浏览器"
+    if not controller.ensure_started():
+        return _tool_result("error", "无法启动浏览器")
 
-    # Navigate to QQ Music
-    if not controller.navigate_to_platform():
-        return "无法访问QQ音乐网站"
+    # Navigate to QQ Music unless the tab is already on the platform
+    if not controller.current_url or not controller.current_url.startswith(controller.base_url):
+        if not controller.navigate_to_platform():
+            return _tool_result("error", "无法访问QQ音乐网站")
 
     # Search for song
     song_info = controller.search_song(song_name)
 
     if song_info:
-        return f"找到歌曲: {song_info.get('title', '未知歌曲')}"
+        title = song_info.get('title') or '未知歌曲'
+        _cache_search(song_name, "qq", title)
+        return _tool_result("found", f"找到歌曲: {title}", title=title)
     else:
-        return f"未找到歌曲: {song_name}"
+        return _tool_result("not_found", f"未找到歌曲: {song_name}", song_name=song_name)
 
 @tool
 def qq_music_play_cdp(song_name: str) -> str:
@@ -417,26 +618,27 @@ def qq_music_play_cdp(song_name: str) -> str:
     Returns:
         播放结果
     """
-    logger.info(f"开始播放QQ音乐歌曲: {song_name}")
+    logger.info("开始播放QQ音乐歌曲: %s", song_name)
 
     controller = get_controller("qq")
 
     # Start browser if not started
-    if not controller.browser:
-        if not controller.start_browser():
-            return "无法启动浏览器"
-
-    # Navigate to QQ Music if not already there
-    if not controller.navigate_to_platform():
-        return "无法访问QQ音乐网站"
-
-    # Search and play
-    song_info = controller.search_song(song_name)
-    if song_info:
-        result = controller.play_song(song_info)
-        return f"播放结果: {result}"
+    if not controller.ensure_started():
+        return _tool_result("error", "无法启动浏览器")
+
+    # Search and play in one script evaluation; it loads the search URL itself
+    result = controller.find_and_play(song_name)
+    if result:
+        if result["clicked"]:
+            _cache_search(song_name, "qq", result["title"] or '未知歌曲')
+        status = "歌曲开始播放" if result["clicked"] else "找到歌曲但无法播放"
+        return _tool_result(
+            "playing" if result["clicked"] else "play_failed",
+            f"播放结果: {status}",
+            title=result["title"],
+        )
     else:
-        return f"未找到歌曲: {song_name}"
+        return _tool_result("not_found", f"未找到歌曲: {song_name}", song_name=song_name)
 
 @tool
 def netease_music_search_cdp(song_name: str) -> str:
@@ -449,26 +651,32 @@ def netease_music_search_cdp(song_name: str) -> str:
     Returns:
         搜索结果信息
     """
-    logger.info(f"开始搜索网易云音乐歌曲: {song_name}")
+    logger.info("开始搜索网易云音乐歌曲: %s", song_name)
+
+    cached = _get_cached_search(song_name, "netease")
+    if cached:
+        return _tool_result("found", f"找到歌曲: {cached}", title=cached)
 
     controller = get_controller("netease")
 
     # Start browser if not started
-    if not controller.browser:
-        if not controller.start_browser():
-            return "无法启动浏览器"
+    if not controller.ensure_started():
+        return _tool_result("error", "无法启动浏览器")
 
-    # Navigate to NetEase Music
-    if not controller.navigate_to_platform():
-        return "无法访问网易云音乐网站"
+    # Navigate to NetEase Music unless the tab is already on the platform
+    if not controller.current_url or not controller.current_url.startswith(controller.base_url):
+        if not controller.navigate_to_platform():
+            return _tool_result("error", "无法访问网易云音乐网站")
 
     # Search for song
     song_info = controller.search_song(song_name)
 
     if song_info:
-        return f"找到歌曲: {song_info.get('title', '未知歌曲')}"
+        title = song_info.get('title') or '未知歌曲'
+        _cache_search(song_name, "netease", title)
+        return _tool_result("found", f"找到歌曲: {title}", title=title)
     else:
-        return f"未找到歌曲: {song_name}"
+        return _tool_result("not_found", f"未找到歌曲: {song_name}", song_name=song_name)
 
 @tool
 def netease_music_play_cdp(song_name: str) -> str:
@@ -481,26 +689,27 @@ def netease_music_play_cdp(song_name: str) -> str:
     Returns:
         播放结果
     """
-    logger.info(f"开始播放网易云音乐歌曲: {song_name}")
+    logger.info("开始播放网易云音乐歌曲: %s", song_name)
 
     controller = get_controller("netease")
 
     # Start browser if not started
-    if not controller.browser:
-        if not controller.start_browser():
-            return "无法启动浏览器"
-
-    # Navigate to NetEase Music if not already there
-    if not controller.navigate_to_platform():
-        return "无法访问网易云音乐网站"
-
-    # Search and play
-    song_info = controller.search_song(song_name)
-    if song_info:
-        result = controller.play_song(song_info)
-        return f"播放结果: {result}"
+    if not controller.ensure_started():
+        return _tool_result("error", "无法启动浏览器")
+
+    # Search and play in one script evaluation; it loads the search URL itself
+    result = controller.find_and_play(song_name)
+    if result:
+        if result["clicked"]:
+            _cache_search(song_name, "netease", result["title"] or '未知歌曲')
+        status = "歌曲开始播放" if result["clicked"] else "无法选择歌曲"
+        return _tool_result(
+            "playing" if result["clicked"] else "play_failed",
+            f"播放结果: {status}",
+            title=result["title"],
+        )
     else:
-        return f"未找到歌曲: {song_name}"
+        return _tool_result("not_found", f"未找到歌曲: {song_name}", song_name=song_name)
 
 # 为了向后兼容，保留类定义
 class QQMusicSearchToolCDP:
@@ -1,52 +1,32 @@
-from typing import Type
+from typing import Optional, Type
 from langchain.tools import BaseTool
-from pydantic import BaseModel, Field
-import time
+from pydantic import BaseModel, Field, model_validator
 
-try:
-    from selenium import webdriver
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.chrome.options import Options
-    from selenium.webdriver.chrome.service import Service
-    from webdriver_manager.chrome import ChromeDriverManager
-except Exception:  # pragma: no cover
-    webdriver = None
+from .qq_music_cdp import qq_music_play_cdp
 
 class QQMusicPlayInput(BaseModel):
-    element_locator: str = Field(..., description="来自搜索工具的定位(href简化)")
+    song_name: Optional[str] = Field(None, description="要播放的歌曲名，可直接使用搜索工具返回的歌曲名")
+    # 旧参数名，保留以兼容已有调用和提示词；新调用请使用 song_name
+    element_locator: Optional[str] = Field(None, description="已废弃，等同于 song_name")
+
+    @model_validator(mode="after")
+    def _require_song(self):
+        if not (self.song_name or self.element_locator):
+            raise ValueError("song_name 不能为空")
+        return self
 
 class QQMusicPlayTool(BaseTool):
     name: str = "qq_music_play"
-    description: str = "根据搜索返回的定位信息打开歌曲页面并尝试播放。"
+    description: str = "在QQ音乐网页搜索歌曲并播放第一个结果。"
     args_schema: Type[BaseModel] = QQMusicPlayInput
 
-    def _run(self, element_locator: str) -> str:  # type: ignore
-        if webdriver is None:
-            return "错误: Selenium 未安装或不可用"
-        try:
-            options = Options()
-            options.add_argument('--headless=new')
-            options.add_argument('--disable-gpu')
-            # 使用 webdriver-manager 自动管理 chromedriver
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=options)
-            driver.get(element_locator)
-            time.sleep(3)
-            # Attempt to click play button - selector may need refinement
-            try:
-                play_btn = driver.find_element(By.CSS_SELECTOR, 'i.play_btn__1uLQX')
-                play_btn.click()
-                status = "已点击播放"
-            except Exception:
-                status = "未找到播放按钮"
-            driver.quit()
-            return status
-        except Exception as e:
-            try:
-                driver.quit()  # type: ignore
-            except Exception:
-                pass
-            return f"播放失败: {e}"
+    def _run(self, song_name: Optional[str] = None, element_locator: Optional[str] = None) -> str:  # type: ignore
+        # element_locator 为旧参数名：按歌曲名走同一条搜索播放路径，链接已无法直接定位
+        song_name = song_name or element_locator
+        if song_name.startswith(("http://", "https://", "//")):
+            return "不再支持通过链接播放，请传入歌曲名"
+        # 复用 CDP 控制器中常驻的浏览器，避免每次调用重新启动 Chrome
+        return qq_music_play_cdp.invoke({"song_name": song_name})
 
     async def _arun(self, *args, **kwargs):  # pragma: no cover
         raise NotImplementedError("qq_music_play 不支持异步")
@@ -9,22 +9,37 @@ sys.path.insert(0, str(project_root))
 
 # Now safe to import from app.backend
 from app.backend.logging_config import setup_logging
-from app.backend.agents import create_map_agent, create_music_agent
+from app.frontend.streaming import stream_in_background
+
+st.set_page_config(page_title="Map & Music Agents", page_icon="🗺️")
 
 # Initialize logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
-st.set_page_config(page_title="Map & Music Agents", page_icon="🗺️")
 
-if "map_agent" not in st.session_state:
-    st.session_state["map_agent"] = create_map_agent()
-if "music_agent" not in st.session_state:
-    st.session_state["music_agent"] = create_music_agent()
+# Agent 在进程内只创建一次，所有会话共享；langchain 等重量级依赖延迟到首次使用时导入
+@st.cache_resource
+def _get_map_agent():
+    from app.backend.agents import create_map_agent
+    return create_map_agent()
+
+
+@st.cache_resource
+def _get_music_agent():
+    from app.backend.agents import create_music_agent
+    return create_music_agent()
+
 
 st.title("Multi-Agent Chat: 地图 & 音乐")
 agent_choice = st.sidebar.selectbox("选择Agent", ["地图Agent", "音乐Agent"], index=0)
 
+# 音乐平台 -> (已指明平台的关键词, 未指明时补充的前缀模板)
+PLATFORM_RULES = {
+    "网易云音乐": (("网易",), "在网易云音乐上{}"),
+    "QQ音乐": (("QQ", "腾讯"), "在QQ音乐上{}"),
+}
+
 # 音乐平台选择
 music_platform = None
 if agent_choice == "音乐Agent":
@@ -39,51 +54,55 @@ chat_key = "chat_history"
 if chat_key not in st.session_state:
     st.session_state[chat_key] = []
 
-for role, content in st.session_state[chat_key]:
-    with st.chat_message(role):
-        st.write(content)
+
+@st.fragment
+def render_history(messages):
+    """渲染聊天记录"""
+    for role, content in messages:
+        with st.chat_message(role):
+            st.write(content)
+
+
+render_history(st.session_state[chat_key])
 
 user_input = st.chat_input("请输入您的需求，例如: '查询上海东方明珠到外滩的驾车路线' 或 '播放 周杰伦 青花瓷'")
 if user_input:
     # 根据选择的音乐平台调整查询
     original_input = user_input
-    if agent_choice == "音乐Agent" and music_platform:
-        if music_platform == "网易云音乐" and "网易" not in user_input:
-            user_input = f"在网易云音乐上{user_input}"
-        elif music_platform == "QQ音乐" and "QQ" not in user_input and "腾讯" not in user_input:
-            user_input = f"在QQ音乐上{user_input}"
+    rule = PLATFORM_RULES.get(music_platform)
+    if rule and not any(k in user_input for k in rule[0]):
+        user_input = rule[1].format(user_input)
 
-    logger.info(f"用户输入: {original_input}, 选择Agent: {agent_choice}, 音乐平台: {music_platform}")
+    logger.info("用户输入: %s, 选择Agent: %s, 音乐平台: %s", original_input, agent_choice, music_platform)
     st.session_state[chat_key].append(("user", original_input))
     with st.chat_message("user"):
         st.write(original_input)
     
     if agent_choice == "地图Agent":
-        agent = st.session_state["map_agent"]
+        agent = _get_map_agent()
     else:
-        agent = st.session_state["music_agent"]
+        agent = _get_music_agent()
     
+    def _stream_reply():
+        """逐块产出模型回复，工具调用消息不展示"""
+        from langchain_core.messages import AIMessageChunk
+
+        for chunk, _metadata in agent.stream(
+            {"messages": [{"role": "user", "content": user_input}]},
+            stream_mode="messages",
+        ):
+            if isinstance(chunk, AIMessageChunk) and chunk.content:
+                yield chunk.content
+
     with st.chat_message("assistant"):
         try:
-            logger.info(f"调用 {agent_choice}...")
-            # 新的 create_agent API 返回的图使用 messages 格式
-            result = agent.invoke({
-                "messages": [{"role": "user", "content": user_input}]
-            })
-            logger.debug(f"Agent 响应: {result}")
-            
-            # 获取最后一条助手消息
-            messages = result.get("messages", [])
-            if messages:
-                last_message = messages[-1]
-                output = last_message.content if hasattr(last_message, 'content') else str(last_message)
-            else:
-                output = "(无输出)"
-            
-            logger.info(f"{agent_choice} 执行成功")
+            logger.info("调用 %s...", agent_choice)
+            # Agent 在后台线程执行，流式渲染：首个 token 到达即开始显示
+            output = st.write_stream(stream_in_background(_stream_reply)) or "(无输出)"
+            logger.info("%s 执行成功", agent_choice)
         except Exception as e:
-            logger.error(f"{agent_choice} 执行失败: {e}", exc_info=True)
+            logger.error("%s 执行失败: %s", agent_choice, e, exc_info=True)
             import traceback
             output = f"错误: {e}\n{traceback.format_exc()}"
-        st.write(output)
+            st.write(output)
     st.session_state[chat_key].append(("assistant", output))
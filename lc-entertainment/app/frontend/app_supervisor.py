@@ -2,7 +2,6 @@ import streamlit as st
 import sys
 import logging
 from pathlib import Path
-import pandas as pd
 
 # Add project root to path
 project_root = Path(__file__).parent.parent.parent
@@ -10,12 +9,7 @@ sys.path.insert(0, str(project_root))
 
 # Now safe to import from app.backend
 from app.backend.logging_config import setup_logging
-from app.backend.agents import get_supervisor_agent
-from app.backend.observability import observability
-
-# Initialize logging
-setup_logging()
-logger = logging.getLogger(__name__)
+from app.frontend.streaming import stream_in_background
 
 st.set_page_config(
     page_title="智能多Agent系统",
@@ -23,41 +17,31 @@ st.set_page_config(
     layout="wide"
 )
 
-# 初始化SupervisorAgent
-if "supervisor" not in st.session_state:
-    st.session_state["supervisor"] = get_supervisor_agent()
-    logger.info("SupervisorAgent 已初始化")
+# Initialize logging
+setup_logging()
+logger = logging.getLogger(__name__)
 
-# 侧边栏配置
-with st.sidebar:
-    st.title("🤖 系统配置")
+# Agent类型对应的显示名称
+AGENT_LABELS = {
+    "map": "🗺️ 地图Agent",
+    "music": "🎵 音乐Agent",
+    "general": "💬 通用对话"
+}
 
-    # 模式选择
-    mode = st.radio(
-        "运行模式",
-        ["智能路由", "手动选择"],
-        help="智能路由：系统自动选择Agent；手动选择：用户指定Agent"
-    )
 
-    # 手动选择Agent（仅在手动模式下显示）
-    manual_agent = None
-    if mode == "手动选择":
-        manual_agent = st.selectbox(
-            "选择Agent",
-            ["map", "music", "general"],
-            format_func=lambda x: {
-                "map": "🗺️ 地图Agent",
-                "music": "🎵 音乐Agent",
-                "general": "💬 通用对话"
-            }[x]
-        )
+# 初始化SupervisorAgent：进程内只创建一次，所有会话共享；后端依赖延迟到首次使用时导入
+@st.cache_resource
+def _get_supervisor():
+    from app.backend.agents import get_supervisor_agent
+    logger.info("SupervisorAgent 已初始化")
+    return get_supervisor_agent()
 
-    st.divider()
 
-    # 系统统计信息
+@st.fragment(run_every="2s")
+def render_statistics(supervisor):
+    """系统统计面板：作为独立片段定时刷新；get_statistics 读取增量计数器，刷新开销为常数"""
     st.subheader("📊 系统统计")
 
-    supervisor = st.session_state["supervisor"]
     stats = supervisor.get_statistics()
 
     col1, col2 = st.columns(2)
@@ -70,26 +54,87 @@ with st.sidebar:
     # Agent使用情况
     if stats["agent_usage"]:
         st.subheader("Agent使用分布")
-        agent_df = pd.DataFrame([
+        st.table([
             {"Agent": k, "次数": v}
             for k, v in stats["agent_usage"].items()
         ])
-        st.dataframe(agent_df, use_container_width=True)
+
+
+@st.cache_data(ttl=5)
+def _build_history_rows(_supervisor, history_key):
+    """构建执行历史表格行（最新的在前），仅在 history_key 变化时重新计算"""
+    return [
+        {
+            "时间": record["timestamp"][:19],
+            "Task ID": record["task_id"],
+            "用户输入": record["user_input"][:30] + "..." if len(record["user_input"]) > 30 else record["user_input"],
+            "Agent": record["agent_type"],
+            "状态": "✅" if record["success"] else "❌",
+            "耗时(s)": f"{record['execution_time']:.2f}"
+        }
+        for record in reversed(_supervisor.get_task_history(limit=20))
+    ]
+
+
+@st.fragment
+def render_history(messages):
+    """渲染聊天记录"""
+    for role, content, metadata in messages:
+        with st.chat_message(role):
+            st.write(content)
+            # 显示元数据
+            if metadata and role == "assistant":
+                with st.expander("📋 执行详情", expanded=False, key=f"exp_{metadata.get('task_id')}"):
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("Agent类型", metadata.get("agent_type", "unknown"))
+                    with col2:
+                        st.metric("执行时间", f"{metadata.get('execution_time', 0):.2f}s")
+                    with col3:
+                        status = "✅ 成功" if metadata.get("success") else "❌ 失败"
+                        st.metric("状态", status)
+
+
+# 侧边栏配置
+with st.sidebar:
+    st.title("🤖 系统配置")
+
+    # 模式选择
+    mode = st.radio(
+        "运行模式",
+        ["智能路由", "手动选择"],
+        help="智能路由：系统自动选择Agent；手动选择：用户指定Agent"
+    )
+
+    # 手动选择Agent（仅在手动模式下显示）
+    manual_agent = None
+    if mode == "手动选择":
+        manual_agent = st.selectbox(
+            "选择Agent",
+            list(AGENT_LABELS),
+            format_func=AGENT_LABELS.__getitem__
+        )
+
+    st.divider()
+
+    supervisor = _get_supervisor()
+    render_statistics(supervisor)
 
     st.divider()
 
     # 可观测性控制
     st.subheader("🔍 可观测性")
 
-    if st.button("查看执行历史"):
+    if st.button("查看执行历史", key="btn_show_history"):
         st.session_state["show_history"] = True
 
-    if st.button("导出追踪数据"):
+    if st.button("导出追踪数据", key="btn_export_traces"):
+        from app.backend.observability import observability
         filepath = observability.export_to_file()
         st.success(f"数据已导出到: {filepath}")
 
-    if st.button("清除历史记录"):
-        supervisor.task_history.clear()
+    if st.button("清除历史记录", key="btn_clear_history"):
+        supervisor.clear_history()
         st.success("历史记录已清除")
         st.rerun()
 
@@ -101,11 +146,7 @@ st.caption("基于 LangChain + DeepSeek 的多Agent协作平台")
 if mode == "智能路由":
     st.info("🎯 当前模式：智能路由 - 系统将自动分析您的需求并选择最合适的Agent")
 else:
-    agent_name = {
-        "map": "🗺️ 地图Agent",
-        "music": "🎵 音乐Agent",
-        "general": "💬 通用对话"
-    }[manual_agent]
+    agent_name = AGENT_LABELS[manual_agent]
     st.info(f"👆 当前模式：手动选择 - 使用 {agent_name}")
 
 # 聊天历史
@@ -114,26 +155,13 @@ if chat_key not in st.session_state:
     st.session_state[chat_key] = []
 
 # 显示聊天记录
-for role, content, metadata in st.session_state[chat_key]:
-    with st.chat_message(role):
-        st.write(content)
-        # 显示元数据
-        if metadata and role == "assistant":
-            with st.expander("📋 执行详情", expanded=False):
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Agent类型", metadata.get("agent_type", "unknown"))
-                with col2:
-                    st.metric("执行时间", f"{metadata.get('execution_time', 0):.2f}s")
-                with col3:
-                    status = "✅ 成功" if metadata.get("success") else "❌ 失败"
-                    st.metric("状态", status)
+render_history(st.session_state[chat_key])
 
 # 用户输入
 user_input = st.chat_input("请输入您的需求...")
 
 if user_input:
-    logger.info(f"用户输入: {user_input}, 模式: {mode}")
+    logger.info("用户输入: %s, 模式: %s", user_input, mode)
 
     # 添加用户消息到历史
     st.session_state[chat_key].append(("user", user_input, None))
@@ -143,77 +171,67 @@ if user_input:
         st.write(user_input)
 
     # 执行任务
-    supervisor = st.session_state["supervisor"]
+    supervisor = _get_supervisor()
 
     with st.chat_message("assistant"):
-        with st.spinner("正在处理..."):
-            try:
-                # 根据模式执行
-                if mode == "智能路由":
-                    result = supervisor.execute_task(user_input)
-                else:
-                    result = supervisor.execute_task(user_input, agent_type=manual_agent)
-
-                # 显示结果
-                st.write(result.content)
-
-                # 显示执行详情
-                with st.expander("📋 执行详情", expanded=False):
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("Agent类型", result.agent_type)
-                    with col2:
-                        st.metric("执行时间", f"{result.metadata.get('execution_time', 0):.2f}s")
-                    with col3:
-                        status = "✅ 成功" if result.success else "❌ 失败"
-                        st.metric("状态", status)
+        try:
+            results = []
+            # Agent 在后台线程执行，首个 token 之前显示等待时长，之后流式渲染回复
+            content = st.write_stream(stream_in_background(
+                lambda: supervisor.execute_task_stream(
+                    user_input,
+                    agent_type=None if mode == "智能路由" else manual_agent,
+                    on_result=results.append,
+                )
+            ))
+            result = results[0]
+
+            # 显示执行详情
+            with st.expander("📋 执行详情", expanded=False, key=f"exp_{result.metadata.get('task_id')}"):
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Agent类型", result.agent_type)
+                with col2:
+                    st.metric("执行时间", f"{result.metadata.get('execution_time', 0):.2f}s")
+                with col3:
+                    status = "✅ 成功" if result.success else "❌ 失败"
+                    st.metric("状态", status)
 
-                    # 显示任务ID
-                    st.code(f"Task ID: {result.metadata.get('task_id')}")
-
-                # 添加到历史
-                st.session_state[chat_key].append((
-                    "assistant",
-                    result.content,
-                    {
-                        "agent_type": result.agent_type,
-                        "execution_time": result.metadata.get("execution_time", 0),
-                        "success": result.success,
-                        "task_id": result.metadata.get("task_id")
-                    }
-                ))
-
-            except Exception as e:
-                error_msg = f"执行失败: {str(e)}"
-                logger.error(error_msg, exc_info=True)
-                st.error(error_msg)
-                st.session_state[chat_key].append(("assistant", error_msg, None))
+                # 显示任务ID
+                st.code(f"Task ID: {result.metadata.get('task_id')}")
+
+            # 添加到历史
+            st.session_state[chat_key].append((
+                "assistant",
+                content,
+                {
+                    "agent_type": result.agent_type,
+                    "execution_time": result.metadata.get("execution_time", 0),
+                    "success": result.success,
+                    "task_id": result.metadata.get("task_id")
+                }
+            ))
+
+        except Exception as e:
+            error_msg = f"执行失败: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            st.error(error_msg)
+            st.session_state[chat_key].append(("assistant", error_msg, None))
 
 # 显示执行历史（如果请求）
 if st.session_state.get("show_history", False):
     st.divider()
     st.subheader("📜 执行历史")
 
-    history = supervisor.get_task_history(limit=20)
-
-    if history:
-        # 创建表格显示
-        history_data = []
-        for record in reversed(history):  # 最新的在前
-            history_data.append({
-                "时间": record["timestamp"][:19],
-                "Task ID": record["task_id"],
-                "用户输入": record["user_input"][:30] + "..." if len(record["user_input"]) > 30 else record["user_input"],
-                "Agent": record["agent_type"],
-                "状态": "✅" if record["success"] else "❌",
-                "耗时(s)": f"{record['execution_time']:.2f}"
-            })
+    task_history = supervisor.task_history
+    history_key = (len(task_history), task_history[-1]["task_id"] if task_history else None)
+    history_data = _build_history_rows(supervisor, history_key)
 
-        df = pd.DataFrame(history_data)
-        st.dataframe(df, use_container_width=True)
+    if history_data:
+        st.table(history_data)
 
         # 关闭历史视图
-        if st.button("关闭历史记录"):
+        if st.button("关闭历史记录", key="btn_close_history"):
             st.session_state["show_history"] = False
             st.rerun()
     else:
@@ -0,0 +1,79 @@
+"""
+前端流式输出辅助：在后台线程中驱动阻塞的 Agent 调用
+
+Streamlit 脚本线程只负责渲染，Agent 的流式迭代在线程池中执行，
+回复片段经队列交回脚本线程；首个片段到达前显示已等待的秒数。
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Iterable, Iterator
+
+import streamlit as st
+
+_DONE = object()
+
+
+@st.cache_resource
+def _get_executor():
+    """共享线程池；ContextThreadPoolExecutor 会把 LangChain 的上下文/回调带入工作线程"""
+    from langchain_core.runnables.config import ContextThreadPoolExecutor
+    return ContextThreadPoolExecutor(max_workers=4)
+
+
+def stream_in_background(
+    make_stream: Callable[[], Iterable[str]],
+    waiting_text: str = "正在处理...",
+    poll_interval: float = 0.1,
+) -> Iterator[str]:
+    """
+    在线程池中迭代 make_stream() 的结果，并在脚本线程中逐块产出
+
+    Args:
+        make_stream: 返回回复片段迭代器的函数，在工作线程中调用
+        waiting_text: 首个片段到达前的提示文字
+        poll_interval: 等待队列的轮询间隔(秒)
+
+    Yields:
+        str: 回复文本片段；工作线程中的异常会在这里重新抛出
+    """
+    chunks: queue.Queue = queue.Queue()
+    stop = threading.Event()
+
+    def _produce():
+        try:
+            for chunk in make_stream():
+                if stop.is_set():
+                    break
+                chunks.put(chunk)
+        except BaseException as e:
+            chunks.put(e)
+        finally:
+            chunks.put(_DONE)
+
+    _get_executor().submit(_produce)
+
+    placeholder = st.empty()
+    start = time.monotonic()
+    waiting = True
+    try:
+        while True:
+            try:
+                item = chunks.get(timeout=poll_interval)
+            except queue.Empty:
+                if waiting:
+                    placeholder.caption(f"{waiting_text} {time.monotonic() - start:.0f}s")
+                continue
+
+            if waiting:
+                placeholder.empty()
+                waiting = False
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        placeholder.empty()
@@ -0,0 +1,39 @@
+"""
+Fetch element HTML through the CDP DOM domain for the inspect scripts.
+
+DOM.getOuterHTML serializes inside the browser and sends the markup over the
+protocol, so large bodies are never built as a JS string just to be sliced.
+Truncation happens on the Python side.
+"""
+
+
+def _query(tab, selector):
+    """Return the nodeId of the first element matching `selector` in the top document, or 0."""
+    root = tab.call_method("DOM.getDocument", depth=0)["root"]["nodeId"]
+    return tab.call_method("DOM.querySelector", nodeId=root, selector=selector).get("nodeId", 0)
+
+
+def _child(node, name):
+    return next((c for c in node.get("children", []) if c.get("nodeName") == name), None)
+
+
+def outer_html(tab, selector, limit=3000):
+    """outerHTML of the first element matching `selector`, truncated to `limit` chars ('' if absent)."""
+    node_id = _query(tab, selector)
+    if not node_id:
+        return ""
+    return tab.call_method("DOM.getOuterHTML", nodeId=node_id)["outerHTML"][:limit]
+
+
+def frame_body_html(tab, frame_selector, limit=3000):
+    """outerHTML of the <body> inside the iframe matching `frame_selector` ('' if unavailable)."""
+    frame_id = _query(tab, frame_selector)
+    if not frame_id:
+        return ""
+    # pierce=True exposes the iframe's contentDocument; a shallow depth keeps the reply small
+    frame = tab.call_method("DOM.describeNode", nodeId=frame_id, depth=3, pierce=True)["node"]
+    html = _child(frame.get("contentDocument", {}), "HTML")
+    body = html and _child(html, "BODY")
+    if not body:
+        return ""
+    return tab.call_method("DOM.getOuterHTML", backendNodeId=body["backendNodeId"])["outerHTML"][:limit]
@@ -0,0 +1,56 @@
+"""
+Event-driven waits shared by the inspect scripts.
+
+Instead of fixed time.sleep() calls, page loads are awaited via Page.loadEventFired
+and DOM readiness via a single Runtime.evaluate(awaitPromise=True) round-trip.
+"""
+
+import json
+import threading
+
+WAIT_FOR_SELECTOR_JS = """
+new Promise(resolve => {
+    const selector = %(selector)s, frameId = %(frame)s;
+    const root = () => {
+        if (!frameId) return document;
+        const frame = document.getElementById(frameId);
+        return frame && frame.contentDocument;
+    };
+    const found = () => { const doc = root(); return !!doc && doc.querySelector(selector) !== null; };
+    if (found()) return resolve(true);
+    const finish = (ok) => { observer.disconnect(); clearInterval(poll); clearTimeout(timer); resolve(ok); };
+    const check = () => { if (found()) finish(true); };
+    // Mutations inside an iframe don't reach observers on the parent document,
+    // so a light in-page interval covers the iframe case.
+    const observer = new MutationObserver(check);
+    observer.observe(document, { childList: true, subtree: true });
+    const poll = setInterval(check, 100);
+    const timer = setTimeout(() => finish(false), %(timeout_ms)d);
+})
+"""
+
+
+def enable_load_event(tab):
+    """Enable Page events and return a threading.Event set on Page.loadEventFired."""
+    loaded = threading.Event()
+    tab.set_listener("Page.loadEventFired", lambda **kwargs: loaded.set())
+    tab.call_method("Page.enable")
+    return loaded
+
+
+def navigate_and_wait(tab, url, loaded, timeout=15):
+    """Navigate and block until the load event fires. Returns False on timeout."""
+    loaded.clear()
+    tab.call_method("Page.navigate", url=url)
+    return loaded.wait(timeout)
+
+
+def wait_for_selector(tab, selector, frame_id=None, timeout=15):
+    """Block until `selector` matches in the page (or in iframe `frame_id`). Returns False on timeout."""
+    expression = WAIT_FOR_SELECTOR_JS % {
+        "selector": json.dumps(selector),
+        "frame": json.dumps(frame_id),
+        "timeout_ms": int(timeout * 1000),
+    }
+    res = tab.call_method("Runtime.evaluate", expression=expression, awaitPromise=True, returnByValue=True)
+    return bool(res.get('result', {}).get('value'))
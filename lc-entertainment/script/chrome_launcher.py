@@ -0,0 +1,58 @@
+"""
+Shared Chrome launcher for the inspect scripts.
+
+Keeps the Chrome install lookup and the remote-debugging flags in one place.
+"""
+
+import functools
+import os
+import socket
+import subprocess
+import time
+
+CHROME_CANDIDATES = (
+    r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+    r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+)
+DEBUG_PORT = 9222
+
+
+def wait_for_port(host, port, timeout=10.0):
+    """Retry a TCP connect every 50ms until `port` accepts or `timeout` expires."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with socket.create_connection((host, port), timeout=0.1):
+                return True
+        except OSError:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+
+@functools.lru_cache(maxsize=1)
+def resolve_chrome_path():
+    """Return the first installed Chrome executable, or None. Resolved once per process."""
+    return next((p for p in CHROME_CANDIDATES if os.path.exists(p)), None)
+
+
+def launch_chrome(user_data_dir, port=DEBUG_PORT):
+    """Start Chrome with remote debugging on `port` using profile `user_data_dir`."""
+    chrome_path = resolve_chrome_path()
+    if chrome_path is None:
+        print("Chrome not found")
+        return False
+    
+    cmd = [
+        chrome_path,
+        f"--remote-debugging-port={port}",
+        f"--user-data-dir={user_data_dir}",
+        "--no-first-run",
+        "--no-default-browser-check"
+    ]
+    print("Starting Chrome...")
+    subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if not wait_for_port("localhost", port):
+        print(f"Chrome debugger did not open port {port}")
+        return False
+    return True
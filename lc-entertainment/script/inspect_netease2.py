@@ -2,45 +2,56 @@
 Inspect NetEase search page by typing in search box and examining the results DOM.
 """
 
-import pychrome
-import time
-import subprocess
-import os
+import requests
 
-def start_chrome():
-    """Start Chrome with remote debugging."""
-    chrome_path = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
-    if not os.path.exists(chrome_path):
-        chrome_path = r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe"
-    
-    if not os.path.exists(chrome_path):
-        print("Chrome not found")
+from cdp_wait import enable_load_event, navigate_and_wait, wait_for_selector
+from chrome_launcher import launch_chrome
+from pychrome_session import DEVTOOLS_URL, get_browser, get_or_create_tab, park_tab, track_tab
+
+NETEASE_HOME = "https://music.163.com/"
+
+def devtools_ready():
+    """Return True if a Chrome debugger is already listening."""
+    try:
+        return requests.get(f"{DEVTOOLS_URL}/json/version", timeout=0.3).ok
+    except requests.RequestException:
         return False
-    
-    cmd = [
-        chrome_path,
-        "--remote-debugging-port=9222",
-        "--user-data-dir=C:\\temp\\chrome_debug_inspect",
-        "--no-first-run",
-        "--no-default-browser-check"
-    ]
-    print("Starting Chrome...")
-    subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    time.sleep(3)
-    return True
+
+def find_netease_tab(browser):
+    """Return an existing tab already on music.163.com, or None."""
+    try:
+        pages = requests.get(f"{DEVTOOLS_URL}/json", timeout=0.3).json()
+    except (requests.RequestException, ValueError):
+        return None
+    ids = {p["id"] for p in pages if p.get("type") == "page" and "music.163.com" in p.get("url", "")}
+    return next((t for t in browser.list_tab() if t.id in ids), None)
+
+def start_chrome():
+    """Start Chrome with remote debugging, reusing a running debugger if present."""
+    if devtools_ready():
+        print("Reusing running Chrome debugger")
+        return True
+    return launch_chrome(r"C:\temp\chrome_debug_inspect")
 
 def inspect_netease():
     """Navigate to NetEase search, type query, and inspect DOM."""
     try:
-        browser = pychrome.Browser(url="http://localhost:9222")
-        tab = browser.new_tab()
-        tab.start()
-        time.sleep(1)
+        browser = get_browser()
+        tab = find_netease_tab(browser)
+        reused = tab is not None
+        if reused:
+            track_tab(tab)
+        else:
+            tab = get_or_create_tab(browser)
+        loaded = enable_load_event(tab)
         
-        # Navigate to NetEase home
-        print("Navigating to NetEase home...")
-        tab.call_method("Page.navigate", url="https://music.163.com/")
-        time.sleep(5)
+        # Navigate to NetEase home (skipped when an existing NetEase tab was reused)
+        if reused:
+            print("Reusing existing NetEase tab")
+        else:
+            print("Navigating to NetEase home...")
+            if not navigate_and_wait(tab, NETEASE_HOME, loaded, timeout=10):
+                print("Timed out waiting for page load")
         
         # Try to find and fill search input
         print("Typing in search box...")
@@ -63,13 +74,13 @@ def inspect_netease():
         print(f"Search input result: {res}")
         
         # Press Enter
-        time.sleep(1)
         print("Pressing Enter...")
         tab.call_method("Input.dispatchKeyEvent", type="keyDown", key="Enter")
         tab.call_method("Input.dispatchKeyEvent", type="keyUp", key="Enter")
         
         # Wait for results
-        time.sleep(5)
+        if not wait_for_selector(tab, '.srchsongst li, .m-table tbody tr', frame_id='g_iframe', timeout=10):
+            print("Timed out waiting for search results")
         
         # Now inspect the results in iframe
         print("\n=== Inspecting search results ===")
@@ -137,7 +148,10 @@ def inspect_netease():
             for btn in result.get('buttons', []):
                 print(f"  {btn['tag']}.{btn['class']} - text:'{btn['text']}' onclick:{btn['onclick']} data-action:{btn.get('dataAction')}")
         
-        tab.stop()
+        if reused:
+            tab.stop()
+        else:
+            park_tab(tab)
         
     except Exception as e:
         print(f"Error: {e}")
@@ -2,43 +2,26 @@
 Navigate directly to a NetEase search results URL and inspect the song list structure.
 """
 
-import pychrome
-import time
-import subprocess
-import os
-
-def start_chrome():
-    """Start Chrome with remote debugging."""
-    chrome_path = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
-    if not os.path.exists(chrome_path):
-        chrome_path = r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe"
-    
-    cmd = [
-        chrome_path,
-        "--remote-debugging-port=9222",
-        "--user-data-dir=C:\\temp\\chrome_debug_inspect",
-        "--no-first-run",
-        "--no-default-browser-check"
-    ]
-    subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    time.sleep(3)
-    return True
+from chrome_launcher import launch_chrome
+from cdp_html import frame_body_html
+from cdp_wait import enable_load_event, navigate_and_wait, wait_for_selector
+from pychrome_session import get_or_create_tab, park_tab
 
 def inspect_netease():
     """Navigate directly to search result and inspect."""
     try:
-        browser = pychrome.Browser(url="http://localhost:9222")
-        tab = browser.new_tab()
-        tab.start()
-        time.sleep(1)
+        tab = get_or_create_tab()
+        loaded = enable_load_event(tab)
         
         # Navigate to a known working search result page
         url = "https://music.163.com/#/search/m/?s=周杰伦"
         print(f"Navigating to: {url}")
-        tab.call_method("Page.navigate", url=url)
-        time.sleep(6)
+        if not navigate_and_wait(tab, url, loaded):
+            print("Timed out waiting for page load")
+        if not wait_for_selector(tab, 'tr[data-id], .srchsongst li, .m-table tbody tr', frame_id='g_iframe'):
+            print("Timed out waiting for search results")
         
-        # Inspect the entire iframe document
+        # Inspect the song list in a single round-trip
         inspect_script = """
         (function(){
             const iframe = document.getElementById('g_iframe');
@@ -117,26 +100,11 @@ def inspect_netease():
             print(f"\nFirst item HTML (first 3000 chars):")
             print(result.get('firstItemHTML', ''))
         
-        # Also try to get the complete body HTML to see page structure
+        # Body HTML is serialized by the browser via DOM.getOuterHTML and truncated here
         print("\n=== Full Body Structure ===")
-        body_script = """
-        (function(){
-            const iframe = document.getElementById('g_iframe');
-            if (!iframe) return { error: 'no iframe' };
-            try {
-                const doc = iframe.contentDocument || iframe.contentWindow.document;
-                return doc.body.outerHTML.substring(0, 5000);
-            } catch (e) {
-                return e.toString();
-            }
-        })();
-        """
-        
-        body_res = tab.call_method("Runtime.evaluate", expression=body_script, returnByValue=True)
-        body_html = body_res.get('result', {}).get('value', '')
-        print(body_html)
+        print(frame_body_html(tab, '#g_iframe', 5000))
         
-        tab.stop()
+        park_tab(tab)
         
     except Exception as e:
         print(f"Error: {e}")
@@ -144,7 +112,7 @@ def inspect_netease():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    if start_chrome():
+    if launch_chrome(r"C:\temp\chrome_debug_inspect"):
         inspect_netease()
     else:
         print("Failed to start Chrome")
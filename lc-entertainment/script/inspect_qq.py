@@ -3,64 +3,22 @@ Inspect QQ Music search page to find correct play button selector.
 Navigate to QQ search results and dump DOM structure for the play button.
 """
 
-import pychrome
-import time
-import subprocess
-import os
-
-def start_chrome():
-    """Start Chrome with remote debugging."""
-    chrome_path = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
-    if not os.path.exists(chrome_path):
-        chrome_path = r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe"
-    
-    cmd = [
-        chrome_path,
-        "--remote-debugging-port=9222",
-        "--user-data-dir=C:\\temp\\chrome_debug_qq",
-        "--no-first-run",
-        "--no-default-browser-check"
-    ]
-    subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    time.sleep(3)
-    return True
+from chrome_launcher import launch_chrome
+from cdp_html import outer_html
+from cdp_wait import enable_load_event, navigate_and_wait, wait_for_selector
+from pychrome_session import get_or_create_tab, park_tab
 
 def inspect_qq():
     """Navigate to QQ search and inspect the play button structure."""
     try:
-        browser = pychrome.Browser(url="http://localhost:9222")
-        tab = browser.new_tab()
-        tab.start()
-        time.sleep(1)
+        tab = get_or_create_tab()
+        loaded = enable_load_event(tab)
         
         # Navigate to QQ search for "晴天"
         url = "https://y.qq.com/n/ryqq/search?w=%E6%99%B4%E5%A4%A9&t=song&remoteplace=txt.yqq.top"
         print(f"Navigating to: {url}")
-        tab.call_method("Page.navigate", url=url)
-        time.sleep(3)
-        
-        # Wait for content to load by polling for search results
-        for attempt in range(10):
-            check_script = """
-            (function(){
-                // Check if search results are loaded
-                const songList = document.querySelectorAll('.songlist__item, .song-item, .song, [data-songid], tr[data-id]');
-                const playBtn = document.querySelector('.songlist__play-all, .play-all-btn, .btn-play');
-                return {
-                    hasResults: songList.length > 0,
-                    itemCount: songList.length,
-                    hasPlayBtn: playBtn != null
-                };
-            })();
-            """
-            res = tab.call_method("Runtime.evaluate", expression=check_script, returnByValue=True)
-            status = res.get('result', {}).get('value', {})
-            print(f"  Attempt {attempt + 1}: items={status.get('itemCount', 0)}, playBtn={status.get('hasPlayBtn', False)}")
-            
-            if status.get('hasResults') or status.get('hasPlayBtn'):
-                print(f"Content loaded!")
-                break
-            time.sleep(1)
+        if not navigate_and_wait(tab, url, loaded):
+            print("Timed out waiting for page load")
         
         # Inspect the page structure
         inspect_script = """
@@ -81,20 +39,19 @@ def inspect_qq():
                 '.player-icon-play'
             ];
             
+            // One selector-list query (single traversal); the array is only used for attribution
             let playButtonInfo = null;
-            for (const sel of playSelectors) {
-                const el = document.querySelector(sel);
-                if (el) {
-                    playButtonInfo = {
-                        selector: sel,
-                        tag: el.tagName,
-                        class: el.className,
-                        text: (el.innerText || el.textContent || '').substring(0, 50),
-                        id: el.id || 'N/A'
-                    };
-                    console.log("Found play button: " + sel);
-                    break;
-                }
+            const el = document.querySelector(playSelectors.join(','));
+            if (el) {
+                const sel = playSelectors.find(s => el.matches(s));
+                playButtonInfo = {
+                    selector: sel,
+                    tag: el.tagName,
+                    class: el.className,
+                    text: (el.innerText || el.textContent || '').substring(0, 50),
+                    id: el.id || 'N/A'
+                };
+                console.log("Found play button: " + sel);
             }
             
             // Find song list items
@@ -125,22 +82,22 @@ def inspect_qq():
                 };
             }
             
-            // Also dump structure around song list
-            const container = document.querySelector('.search_content, .songlist, .song-list-container, [class*="songlist"]');
-            let containerHtml = '';
-            if (container) {
-                containerHtml = container.outerHTML.substring(0, 3000);
-            }
-            
             return {
                 itemsFound: items.length,
                 playButton: playButtonInfo,
-                firstItem: firstItemInfo,
-                containerHtml: containerHtml
+                firstItem: firstItemInfo
             };
         })();
         """
         
+        # Wait for search results (or a play button) in one awaitPromise round-trip
+        ready_selector = ('.songlist__item, .song-item, .song, [data-songid], tr[data-id], '
+                          '.songlist__play-all, .play-all-btn, .btn-play')
+        if wait_for_selector(tab, ready_selector, timeout=10):
+            print("Content loaded!")
+        else:
+            print("Timed out waiting for search results")
+        
         res = tab.call_method("Runtime.evaluate", expression=inspect_script, returnByValue=True)
         result = res.get('result', {}).get('value', {})
         
@@ -168,11 +125,13 @@ def inspect_qq():
                 for i, btn in enumerate(fi['buttons']):
                     print(f"  [{i}] <{btn['tag']}.{btn['class']}> text='{btn['text']}' title='{btn.get('title')}' id='{btn.get('id')}'")
         
-        if result.get('containerHtml'):
+        # Also dump structure around song list
+        container_html = outer_html(tab, '.search_content, .songlist, .song-list-container, [class*="songlist"]', 3000)
+        if container_html:
             print(f"\n=== Container HTML (first 3000 chars) ===")
-            print(result.get('containerHtml', ''))
+            print(container_html)
         
-        tab.stop()
+        park_tab(tab)
         
     except Exception as e:
         print(f"Error: {e}")
@@ -180,7 +139,7 @@ def inspect_qq():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    if start_chrome():
+    if launch_chrome(r"C:\temp\chrome_debug_qq"):
         inspect_qq()
     else:
         print("Failed to start Chrome")
@@ -0,0 +1,69 @@
+"""
+Shared pychrome session for the inspect scripts.
+
+One module-level Browser per process, plus the reusable inspector tab. Tabs
+handed out here are detached at interpreter exit even if a script bails out
+early on an exception.
+"""
+
+import atexit
+
+import pychrome
+import requests
+
+from chrome_launcher import DEBUG_PORT
+
+DEVTOOLS_URL = f"http://localhost:{DEBUG_PORT}"
+# URL the shared inspector tab is parked on between runs
+INSPECTOR_MARKER = "about:blank#inspector"
+
+_BROWSER = None
+_TABS = []
+
+
+def get_browser():
+    """Return the process-wide Browser for the local debugger."""
+    global _BROWSER
+    if _BROWSER is None:
+        _BROWSER = pychrome.Browser(url=DEVTOOLS_URL)
+    return _BROWSER
+
+
+def track_tab(tab):
+    """Start `tab` (no-op if already attached) and stop it at exit if still attached."""
+    tab.start()
+    if tab not in _TABS:
+        _TABS.append(tab)
+    return tab
+
+
+def get_or_create_tab(browser=None):
+    """Return the started inspector tab, reusing the one parked on INSPECTOR_MARKER if present."""
+    browser = browser or get_browser()
+    try:
+        pages = requests.get(f"{DEVTOOLS_URL}/json", timeout=0.3).json()
+    except (requests.RequestException, ValueError):
+        pages = []
+    ids = {p["id"] for p in pages if p.get("type") == "page" and p.get("url") == INSPECTOR_MARKER}
+    tab = next((t for t in browser.list_tab() if t.id in ids), None)
+    if tab is not None:
+        return track_tab(tab)
+    tab = track_tab(browser.new_tab())
+    # /json/new drops the URL fragment, so tag the tab by navigating to the marker
+    tab.call_method("Page.navigate", url=INSPECTOR_MARKER)
+    return tab
+
+
+def park_tab(tab):
+    """Send the tab back to INSPECTOR_MARKER and detach, leaving it for the next run."""
+    try:
+        tab.call_method("Page.navigate", url=INSPECTOR_MARKER, _timeout=5)
+    finally:
+        tab.stop()
+
+
+@atexit.register
+def _stop_tabs():
+    for tab in _TABS:
+        if tab.status == pychrome.Tab.status_started:
+            tab.stop()
@@ -2,8 +2,10 @@
 测试天气 Agent 和工具
 这是一个示例测试文件，展示如何测试新创建的 Agent
 """
+import asyncio
 import logging
 from app.backend.agents import create_weather_agent
+from app.backend.agents.weather_agent import arun_weather_queries
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -21,16 +23,18 @@ def test_weather_agent():
         "深圳今天适合出门吗",
     ]
     
-    for query in queries:
+    # 工具为 async 实现，查询之间相互独立，并发执行
+    responses = asyncio.run(arun_weather_queries(agent, queries))
+    
+    for query, response in zip(queries, responses):
         logger.info(f"\n{'='*60}")
         logger.info(f"查询: {query}")
         logger.info(f"{'='*60}")
         
-        try:
-            response = agent.invoke({"messages": [{"role": "user", "content": query}]})
+        if isinstance(response, Exception):
+            logger.error(f"查询失败: {str(response)}")
+        else:
             logger.info(f"回复: {response}")
-        except Exception as e:
-            logger.error(f"查询失败: {str(e)}")
 
 if __name__ == "__main__":
     test_weather_agent()
@@ -2,6 +2,7 @@
 天气 Agent - 负责天气查询和预报
 这是一个示例 Agent，展示如何创建新的 Agent
 """
+import asyncio
 import logging
 from langchain.agents import create_agent
 from ..llm import llm
@@ -9,6 +10,7 @@ from ..tools import weather_query, weather_forecast
 
 logger = logging.getLogger(__name__)
 
+# 静态提示词：不插值任何动态内容，系统提示词与工具定义组成的前缀每次请求都相同
 WEATHER_SYSTEM_PROMPT = (
     "你是 AgentWeather，一个专业的天气查询助理。\n\n"
     "工作流程:\n"
@@ -37,3 +39,16 @@ def create_weather_agent():
     
     logger.info("天气 Agent 创建成功")
     return agent
+
+
+async def arun_weather_queries(agent, queries):
+    """
+    并发执行多条相互独立的查询
+    
+    工具为 async 实现，需通过 ainvoke 调用；单条查询中的多个工具调用由 LangGraph 并发执行，
+    多条查询之间通过 asyncio.gather 并发。
+    """
+    return await asyncio.gather(
+        *(agent.ainvoke({"messages": [{"role": "user", "content": q}]}) for q in queries),
+        return_exceptions=True,
+    )
@@ -1,14 +1,20 @@
 """
 示例工具 - 天气查询
 展示如何创建符合规范的工具
+
+工具定义为 async 函数：Agent 通过 ainvoke 调用时，同一轮中的多个工具调用
+（如同时查询两个城市）会并发执行，总耗时取决于最慢的一次调用而不是累加。
+实际调用天气 API 时应使用模块级共享的 httpx.AsyncClient 并 await 请求。
 """
 from langchain.tools import tool
+from cachetools import TTLCache, cached
+from types import MappingProxyType
 import logging
 
 logger = logging.getLogger(__name__)
 
 @tool
-def weather_query(location: str) -> dict:
+async def weather_query(location: str) -> dict:
     """
     查询指定地点的当前天气情况。
     
@@ -40,8 +46,23 @@ def weather_query(location: str) -> dict:
             "message": f"查询天气失败: {str(e)}"
         }
 
+# 预报数据按 (地点, 天数) 缓存 10 分钟，缓存期内重复查询不再请求天气 API
+# 缓存中的对象会返回给所有调用方，因此存为只读的 tuple / MappingProxyType
+@cached(TTLCache(maxsize=256, ttl=600))
+def _forecast(location: str, days: int) -> tuple:
+    # 模拟 API 调用
+    return tuple(
+        MappingProxyType({
+            "date": f"第{i+1}天",
+            "temperature_high": f"{20+i}°C",
+            "temperature_low": f"{15+i}°C",
+            "condition": "多云转晴"
+        })
+        for i in range(days)
+    )
+
 @tool
-def weather_forecast(location: str, days: int = 3) -> dict:
+async def weather_forecast(location: str, days: int = 3) -> dict:
     """
     查询指定地点的未来天气预报。
     
@@ -55,20 +76,11 @@ def weather_forecast(location: str, days: int = 3) -> dict:
     logger.info(f"执行天气预报查询: {location}, {days}天")
     
     try:
-        # 模拟 API 调用
-        forecast_data = []
-        for i in range(min(days, 7)):
-            forecast_data.append({
-                "date": f"第{i+1}天",
-                "temperature_high": f"{20+i}°C",
-                "temperature_low": f"{15+i}°C",
-                "condition": "多云转晴"
-            })
-        
         result = {
             "status": "success",
             "location": location,
-            "forecast": forecast_data
+            # 复制为普通 dict 返回，调用方修改结果不会影响缓存
+            "forecast": [dict(day) for day in _forecast(location, min(days, 7))]
         }
         logger.info(f"天气预报查询成功")
         return result
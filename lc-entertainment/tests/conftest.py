@@ -0,0 +1,28 @@
+"""
+pytest 共享夹具
+
+可用 pytest-xdist 并行运行: pytest -n auto
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.backend.agents import get_supervisor_agent
+from app.backend.tools.amap_poi_search import AmapPoiSearchTool
+
+
+@pytest.fixture(scope="session")
+def supervisor():
+    """每个测试进程共享一个 SupervisorAgent 单例"""
+    return get_supervisor_agent()
+
+
+@pytest.fixture(scope="session")
+def poi_tool():
+    """每个测试进程共享一个 POI 搜索工具实例"""
+    return AmapPoiSearchTool()
@@ -0,0 +1,72 @@
+"""
+测试可观测性模块：NDJSON 增量导出、追踪采样和丢弃计数
+"""
+import json
+
+import pytest
+
+from app.backend.observability import NOOP_TRACE_ID, new_id, observability
+
+
+@pytest.fixture
+def obs(monkeypatch, tmp_path):
+    """导出目录指向临时目录，采样率恢复为全量"""
+    monkeypatch.setattr(observability, "log_dir", tmp_path)
+    monkeypatch.setattr(observability, "sample_rate", 1.0)
+    return observability
+
+
+def _read_ndjson(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_export_appends_only_new_records(obs):
+    """同一文件再次导出时只追加新的追踪/事件和一行快照"""
+    filename = f"export_{new_id()}.jsonl"
+    first = _read_ndjson(obs.export_to_file(filename, wait=True))
+    assert first[-1]["type"] == "snapshot"
+
+    trace_id = obs.start_trace("export_test")
+    obs.end_trace(trace_id)
+    obs.record_event("export_test", {"n": 1}, trace_id=trace_id)
+
+    lines = _read_ndjson(obs.export_to_file(filename, wait=True))
+    appended = lines[len(first):]
+    assert [r["type"] for r in appended] == ["trace", "trace", "event", "snapshot"]
+    assert {r["trace_id"] for r in appended if r["type"] == "trace"} == {trace_id}
+    assert appended[2]["data"] == {"n": 1}
+
+
+def test_unsampled_trace_drops_spans_and_events(obs):
+    """采样率为 0 时不记录追踪及其所属事件，不属于追踪的事件照常记录"""
+    obs.sample_rate = 0.0
+    event_type = f"sampling_test_{new_id()}"
+
+    trace_id = obs.start_trace("sampling_test")
+    assert trace_id == NOOP_TRACE_ID
+    obs.trace(trace_id, "step")
+    obs.record_event(event_type, {"sampled": False}, trace_id=trace_id)
+    obs.record_event(event_type, {"sampled": None})
+
+    assert obs.get_traces(trace_id=NOOP_TRACE_ID) == []
+    assert [e["data"] for e in obs.get_events(event_type=event_type)] == [{"sampled": None}]
+
+
+def test_full_buffers_count_dropped_records(obs):
+    """线程缓冲区和全局环形缓冲区挤出的记录都计入 dropped_traces / dropped_events"""
+    # 持有合并锁，后台线程不会在写入过程中合并，线程缓冲区必然写满
+    with obs._flush_lock:
+        obs.flush()
+        before = obs.get_statistics()
+        extra = 5
+        count = obs._buffer().traces.maxlen + extra
+        for i in range(count):
+            obs.trace("overflow_test", f"span_{i}")
+            obs.record_event("overflow_test", {"i": i})
+        after = obs.get_statistics()
+
+    # 写入的记录要么留在环形缓冲区，要么计入丢弃数
+    assert after["dropped_traces"] - before["dropped_traces"] == before["total_traces"] + count - after["total_traces"]
+    assert after["dropped_events"] - before["dropped_events"] == before["total_events"] + count - after["total_events"]
+    assert after["dropped_traces"] - before["dropped_traces"] >= extra
@@ -1,28 +1,30 @@
 import pychrome
-import time
-import subprocess
-import os
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "script"))
+from chrome_launcher import launch_chrome
 
 # Test pychrome API
 try:
     # Start browser first
-    chrome_path = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
-    if os.path.exists(chrome_path):
-        cmd = [chrome_path, "--remote-debugging-port=9222", "--user-data-dir=C:\\temp\\chrome_debug", "--no-first-run", "--no-default-browser-check"]
-        subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        time.sleep(3)
+    launch_chrome(r"C:\temp\chrome_debug")
 
     print("Connecting to browser...")
     browser = pychrome.Browser(url="http://localhost:9222")
     tab = browser.new_tab()
     tab.start()
-    time.sleep(1)
 
     # Set up event listener for page load
+    page_loaded = threading.Event()
+
     def on_page_loaded(**kwargs):
         print("Page loaded!")
+        page_loaded.set()
 
     tab.set_listener("Page.loadEventFired", on_page_loaded)
+    tab.call_method("Page.enable")
 
     # Test different API calls
     print("Testing Page.navigate...")
@@ -30,8 +32,10 @@ try:
     print("Navigation called successfully")
 
     # Wait for page to load
-    time.sleep(5)
-    print("Waited for page load")
+    if page_loaded.wait(timeout=15):
+        print("Waited for page load")
+    else:
+        print("Timed out waiting for page load")
 
     # Test Runtime.evaluate
     print("Testing Runtime.evaluate...")
@@ -1,15 +1,20 @@
 """
 测试 Supervisor Agent 的任务路由和执行能力
 """
+import asyncio
 import logging
 import sys
 from pathlib import Path
 
+import numpy as np
+import pytest
+
 # Add project root to path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from app.backend.agents import get_supervisor_agent
+from app.backend.agents import supervisor_agent
+from app.backend.agents.supervisor_agent import SemanticCache, _match_keywords
 from app.backend.observability import observability
 
 # 配置日志
@@ -20,14 +25,88 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def test_intent_recognition():
+class _FakeEncoder:
+    """固定句向量的编码器，替代 SentenceTransformer，测试不需要下载模型"""
+
+    VECTORS = {
+        "播放周杰伦": [1.0, 0.0],
+        "放一首周杰伦的歌": [0.99, 0.14],
+        "今天天气怎么样": [0.0, 1.0],
+    }
+
+    def encode(self, text, normalize_embeddings=True):
+        vector = np.array(self.VECTORS[text])
+        return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def fake_encoder(monkeypatch):
+    monkeypatch.setattr(supervisor_agent, "SentenceTransformer", lambda model_name: _FakeEncoder())
+    supervisor_agent._load_embedder_once.cache_clear()
+    yield
+    supervisor_agent._load_embedder_once.cache_clear()
+
+
+@pytest.mark.parametrize("user_input, expected", [
+    ("导航到公司", "map"),
+    ("从北京天安门到故宫怎么走", "map"),
+    ("附近的加油站", "map"),
+    ("播放周杰伦的晴天", "music"),
+    ("打开网易云", "music"),
+    ("导航去公司并播放音乐", None),  # 两类都命中，交给模型判断
+    ("去年的今天发生了什么", None),
+    ("过去的事情就让它过去吧", None),
+    ("你好", None),
+])
+def test_match_keywords(user_input, expected):
+    """关键词匹配：只命中一类时直接路由"""
+    assert _match_keywords(user_input) == expected
+
+
+def test_semantic_cache_exact_hit_without_encoder(monkeypatch):
+    """未安装 sentence-transformers 时退化为规范化文本的精确匹配"""
+    monkeypatch.setattr(supervisor_agent, "SentenceTransformer", None)
+    cache = SemanticCache("any-model")
+
+    cached, vector = asyncio.run(cache.aget("播放 周杰伦"))
+    assert cached is None and vector is None
+    cache.put("播放 周杰伦", ["music"], vector)
+
+    assert asyncio.run(cache.aget("播放周杰伦")) == (["music"], None)
+    assert asyncio.run(cache.aget("放一首周杰伦的歌")) == (None, None)
+
+
+def test_semantic_cache_vector_hit(fake_encoder):
+    """相似输入通过句向量命中，未命中时返回的句向量可直接写入缓存"""
+    cache = SemanticCache("fake-model", threshold=0.9)
+
+    cached, vector = asyncio.run(cache.aget("播放周杰伦"))
+    assert cached is None and vector is not None
+    cache.put("播放周杰伦", ["music"], vector)
+
+    cached, _ = asyncio.run(cache.aget("放一首周杰伦的歌"))
+    assert cached == ["music"]
+    cached, _ = asyncio.run(cache.aget("今天天气怎么样"))
+    assert cached is None
+
+
+def test_semantic_cache_ttl_expiry(fake_encoder):
+    """过期条目对精确匹配和向量匹配都不再命中"""
+    cache = SemanticCache("fake-model", threshold=0.9, ttl=0)
+
+    _, vector = asyncio.run(cache.aget("播放周杰伦"))
+    cache.put("播放周杰伦", ["music"], vector)
+
+    assert asyncio.run(cache.aget("播放周杰伦"))[0] is None
+    assert asyncio.run(cache.aget("放一首周杰伦的歌"))[0] is None
+
+
+def test_intent_recognition(supervisor):
     """测试意图识别功能"""
     logger.info("\n" + "="*80)
     logger.info("测试 1: 意图识别")
     logger.info("="*80)
 
-    supervisor = get_supervisor_agent()
-
     test_cases = [
         ("查询上海东方明珠到外滩的路线", "map"),
         ("播放周杰伦的青花瓷", "music"),
@@ -37,9 +116,11 @@ def test_intent_recognition():
         ("你好", "general"),
     ]
 
+    # 各用例相互独立，并发分析
+    detected = supervisor.analyze_intent_batch([c[0] for c in test_cases])
+
     correct = 0
-    for user_input, expected_agent in test_cases:
-        detected_agent = supervisor.analyze_intent(user_input)
+    for (user_input, expected_agent), detected_agent in zip(test_cases, detected):
         is_correct = detected_agent == expected_agent
         correct += is_correct
 
@@ -50,26 +131,24 @@ def test_intent_recognition():
     accuracy = correct / len(test_cases) * 100
     logger.info(f"\n意图识别准确率: {accuracy:.1f}% ({correct}/{len(test_cases)})")
 
-    return accuracy >= 80  # 期望至少80%准确率
+    assert accuracy >= 80, f"意图识别准确率过低: {accuracy:.1f}%"  # 期望至少80%准确率
 
 
-def test_map_agent_routing():
+def test_map_agent_routing(supervisor):
     """测试地图Agent路由"""
     logger.info("\n" + "="*80)
     logger.info("测试 2: 地图Agent任务执行")
     logger.info("="*80)
 
-    supervisor = get_supervisor_agent()
-
     queries = [
         "查询北京天安门的位置",
         "从上海人民广场到东方明珠的驾车路线",
     ]
 
-    for query in queries:
-        logger.info(f"\n查询: {query}")
-        result = supervisor.execute_task(query)
+    results = supervisor.execute_task_batch(queries)
 
+    for query, result in zip(queries, results):
+        logger.info(f"\n查询: {query}")
         logger.info(f"Agent类型: {result.agent_type}")
         logger.info(f"执行状态: {'成功' if result.success else '失败'}")
         logger.info(f"执行时间: {result.metadata.get('execution_time', 0):.2f}秒")
@@ -78,26 +157,22 @@ def test_map_agent_routing():
         # 验证是否正确路由到map agent
         assert result.agent_type == "map", f"期望使用map agent,实际使用了{result.agent_type}"
 
-    return True
-
 
-def test_music_agent_routing():
+def test_music_agent_routing(supervisor):
     """测试音乐Agent路由"""
     logger.info("\n" + "="*80)
     logger.info("测试 3: 音乐Agent任务执行")
     logger.info("="*80)
 
-    supervisor = get_supervisor_agent()
-
     queries = [
         "播放周杰伦的晴天",
         "在QQ音乐搜索夜曲",
     ]
 
-    for query in queries:
-        logger.info(f"\n查询: {query}")
-        result = supervisor.execute_task(query)
+    results = supervisor.execute_task_batch(queries)
 
+    for query, result in zip(queries, results):
+        logger.info(f"\n查询: {query}")
         logger.info(f"Agent类型: {result.agent_type}")
         logger.info(f"执行状态: {'成功' if result.success else '失败'}")
         logger.info(f"执行时间: {result.metadata.get('execution_time', 0):.2f}秒")
@@ -106,17 +181,13 @@ def test_music_agent_routing():
         # 验证是否正确路由到music agent
         assert result.agent_type == "music", f"期望使用music agent,实际使用了{result.agent_type}"
 
-    return True
 
-
-def test_manual_routing():
+def test_manual_routing(supervisor):
     """测试手动指定Agent"""
     logger.info("\n" + "="*80)
     logger.info("测试 4: 手动指定Agent类型")
     logger.info("="*80)
 
-    supervisor = get_supervisor_agent()
-
     # 用一个地图类查询，但手动指定使用general agent
     query = "查询北京天安门"
     logger.info(f"查询: {query}")
@@ -127,17 +198,13 @@ def test_manual_routing():
     logger.info(f"实际使用: {result.agent_type}")
     assert result.agent_type == "general", "手动指定Agent失败"
 
-    return True
-
 
-def test_task_history():
+def test_task_history(supervisor):
     """测试任务历史记录"""
     logger.info("\n" + "="*80)
     logger.info("测试 5: 任务历史记录")
     logger.info("="*80)
 
-    supervisor = get_supervisor_agent()
-
     # 执行几个任务
     queries = [
         "你好",
@@ -145,8 +212,7 @@ def test_task_history():
         "播放青花瓷"
     ]
 
-    for query in queries:
-        supervisor.execute_task(query)
+    supervisor.execute_task_batch(queries)
 
     # 获取历史记录
     history = supervisor.get_task_history(limit=10)
@@ -160,16 +226,15 @@ def test_task_history():
         logger.info(f"  状态: {'成功' if record['success'] else '失败'}")
         logger.info(f"  耗时: {record['execution_time']:.2f}秒")
 
-    return len(history) >= 3
+    assert len(history) >= 3, f"历史记录数量不足: {len(history)}"
 
 
-def test_statistics():
+def test_statistics(supervisor):
     """测试统计功能"""
     logger.info("\n" + "="*80)
     logger.info("测试 6: 统计信息")
     logger.info("="*80)
 
-    supervisor = get_supervisor_agent()
     stats = supervisor.get_statistics()
 
     logger.info(f"总任务数: {stats['total_tasks']}")
@@ -179,8 +244,6 @@ def test_statistics():
     for agent_type, count in stats['agent_usage'].items():
         logger.info(f"  {agent_type}: {count}次")
 
-    return True
-
 
 def test_observability():
     """测试可观测性功能"""
@@ -199,59 +262,3 @@ def test_observability():
     filepath = observability.export_to_file()
     logger.info(f"可观测数据已导出到: {filepath}")
 
-    return True
-
-
-def run_all_tests():
-    """运行所有测试"""
-    logger.info("\n" + "#"*80)
-    logger.info("# Supervisor Agent 完整测试套件")
-    logger.info("#"*80)
-
-    tests = [
-        ("意图识别", test_intent_recognition),
-        ("地图Agent路由", test_map_agent_routing),
-        ("音乐Agent路由", test_music_agent_routing),
-        ("手动指定Agent", test_manual_routing),
-        ("任务历史记录", test_task_history),
-        ("统计功能", test_statistics),
-        ("可观测性", test_observability),
-    ]
-
-    results = []
-    for test_name, test_func in tests:
-        try:
-            success = test_func()
-            results.append((test_name, success, None))
-            logger.info(f"\n✅ {test_name} - 通过")
-        except Exception as e:
-            results.append((test_name, False, str(e)))
-            logger.error(f"\n❌ {test_name} - 失败: {e}", exc_info=True)
-
-    # 汇总结果
-    logger.info("\n" + "="*80)
-    logger.info("测试结果汇总")
-    logger.info("="*80)
-
-    passed = sum(1 for _, success, _ in results if success)
-    total = len(results)
-
-    for test_name, success, error in results:
-        status = "✅ 通过" if success else f"❌ 失败: {error}"
-        logger.info(f"{test_name}: {status}")
-
-    logger.info(f"\n总计: {passed}/{total} 通过 ({passed/total*100:.1f}%)")
-
-    return passed == total
-
-
-if __name__ == "__main__":
-    try:
-        success = run_all_tests()
-        sys.exit(0 if success else 1)
-    except KeyboardInterrupt:
-        logger.info("\n测试被用户中断")
-        sys.exit(1)
-    except Exception as e:
-        logger.error(f"\n测试执行失败: {e}", exc_info=True)
-        sys.exit(1)
@@ -2,9 +2,15 @@
 """
 简单验证脚本 - 测试 Supervisor Agent 架构的基本功能
 """
+import os
 import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# 设置 VERIFY_DEBUG=1 时打印失败的完整堆栈
+DEBUG = bool(os.getenv("VERIFY_DEBUG"))
+
 # Add project root to path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
@@ -13,22 +19,9 @@ from app.backend.agents import get_supervisor_agent
 from app.backend.observability import observability
 
 
-def main():
-    print("=" * 80)
-    print("Supervisor Agent 架构验证")
-    print("=" * 80)
-
-    # 1. 初始化 Supervisor
-    print("\n[1/5] 初始化 SupervisorAgent...")
-    try:
-        supervisor = get_supervisor_agent()
-        print("✅ SupervisorAgent 初始化成功")
-    except Exception as e:
-        print(f"❌ 初始化失败: {e}")
-        return False
-
-    # 2. 测试意图分析
-    print("\n[2/5] 测试意图分析...")
+def check_intent(supervisor):
+    """意图分析，返回 (是否通过, 输出行)"""
+    lines = ["\n[2/6] 测试意图分析..."]
     try:
         test_inputs = [
             ("查询北京天安门", "map"),
@@ -36,31 +29,61 @@ def main():
             ("你好", "general"),
         ]
 
-        for user_input, expected in test_inputs:
-            result = supervisor.analyze_intent(user_input)
+        detected = supervisor.analyze_intent_batch([q for q, _ in test_inputs])
+        for (user_input, expected), result in zip(test_inputs, detected):
             status = "✅" if result == expected else "⚠️"
-            print(f"  {status} '{user_input}' -> {result} (期望: {expected})")
+            lines.append(f"  {status} '{user_input}' -> {result} (期望: {expected})")
 
-        print("✅ 意图分析测试完成")
+        lines.append("✅ 意图分析测试完成")
+        return True, lines
     except Exception as e:
-        print(f"❌ 意图分析失败: {e}")
-        return False
+        lines.append(f"❌ 意图分析失败: {e}")
+        return False, lines
 
-    # 3. 测试任务执行（使用 general agent，不依赖外部服务）
-    print("\n[3/5] 测试任务执行...")
+
+def check_execution(supervisor):
+    """任务执行（使用 general agent，不依赖外部服务），返回 (是否通过, 输出行)"""
+    lines = ["\n[3/6] 测试任务执行..."]
     try:
         result = supervisor.execute_task("你好", agent_type="general")
-        print(f"  Agent类型: {result.agent_type}")
-        print(f"  执行状态: {'成功' if result.success else '失败'}")
-        print(f"  执行时间: {result.metadata.get('execution_time', 0):.2f}秒")
-        print(f"  返回内容: {result.content[:100]}...")
-        print("✅ 任务执行测试完成")
+        lines.append(f"  Agent类型: {result.agent_type}")
+        lines.append(f"  执行状态: {'成功' if result.success else '失败'}")
+        lines.append(f"  执行时间: {result.metadata.get('execution_time_ns', 0) / 1e9:.2f}秒")
+        lines.append(f"  返回内容: {result.content[:100]}...")
+        lines.append("✅ 任务执行测试完成")
+        return True, lines
     except Exception as e:
-        print(f"❌ 任务执行失败: {e}")
+        lines.append(f"❌ 任务执行失败: {e}")
+        return False, lines
+
+
+def main():
+    print("=" * 80)
+    print("Supervisor Agent 架构验证")
+    print("=" * 80)
+
+    # 1. 初始化 Supervisor
+    print("\n[1/6] 初始化 SupervisorAgent...")
+    try:
+        supervisor = get_supervisor_agent()
+        print("✅ SupervisorAgent 初始化成功")
+    except Exception as e:
+        print(f"❌ 初始化失败: {e}")
         return False
 
+    # 2-3. 意图分析和任务执行都要等待 LLM，相互独立，并发执行；
+    #      输出先缓存，按编号顺序打印
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(check, supervisor) for check in (check_intent, check_execution)]
+    for future in futures:
+        ok, lines = future.result()
+        print("\n".join(lines))
+        if not ok:
+            return False
+
+    # 4-6 读取前面步骤产生的状态，在并发步骤完成后执行
     # 4. 测试历史记录
-    print("\n[4/5] 测试历史记录...")
+    print("\n[4/6] 测试历史记录...")
     try:
         history = supervisor.get_task_history(limit=5)
         print(f"  历史记录数量: {len(history)}")
@@ -70,7 +93,7 @@ def main():
         return False
 
     # 5. 测试统计功能
-    print("\n[5/5] 测试统计功能...")
+    print("\n[5/6] 测试统计功能...")
     try:
         stats = supervisor.get_statistics()
         print(f"  总任务数: {stats['total_tasks']}")
@@ -105,6 +128,6 @@ if __name__ == "__main__":
         sys.exit(0 if success else 1)
     except Exception as e:
         print(f"\n❌ 验证过程出错: {e}")
-        import traceback
-        traceback.print_exc()
+        if DEBUG:
+            traceback.print_exc()
         sys.exit(1)
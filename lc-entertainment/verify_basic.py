@@ -2,9 +2,14 @@
 """
 基础验证脚本 - 测试 Supervisor Agent 架构的基本结构（不依赖 LLM 服务）
 """
+import os
 import sys
+import traceback
 from pathlib import Path
 
+# 设置 VERIFY_DEBUG=1 时打印失败的完整堆栈
+DEBUG = bool(os.getenv("VERIFY_DEBUG"))
+
 # Add project root to path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
@@ -75,8 +80,8 @@ def main():
         print(f"  - 指标数量: {stats['metrics_count']}")
     except Exception as e:
         print(f"❌ ObservabilityManager 测试失败: {e}")
-        import traceback
-        traceback.print_exc()
+        if DEBUG:
+            traceback.print_exc()
         return False
 
     # 4. 测试文件结构
@@ -110,7 +115,7 @@ def main():
     # 5. 测试导出功能
     print("\n[5/5] 测试数据导出...")
     try:
-        filepath = observability.export_to_file()
+        filepath = observability.export_to_file(wait=True)
         export_path = Path(filepath)
 
         if export_path.exists():
@@ -123,8 +128,8 @@ def main():
             return False
     except Exception as e:
         print(f"❌ 数据导出失败: {e}")
-        import traceback
-        traceback.print_exc()
+        if DEBUG:
+            traceback.print_exc()
         return False
 
     print("\n" + "=" * 80)
@@ -132,7 +137,7 @@ def main():
     print("=" * 80)
     print("\n提示：")
     print("  - 完整功能测试需要 LLM 服务（Ollama）运行")
-    print("  - 运行 'python tests/test_supervisor_agent.py' 进行完整测试")
+    print("  - 运行 'pytest tests/test_supervisor_agent.py' 进行完整测试")
     print("  - 运行 'python run_app_supervisor.py' 启动 Web 界面")
     return True
 
@@ -143,6 +148,6 @@ if __name__ == "__main__":
         sys.exit(0 if success else 1)
     except Exception as e:
         print(f"\n❌ 验证过程出错: {e}")
-        import traceback
-        traceback.print_exc()
+        if DEBUG:
+            traceback.print_exc()
         sys.exit(1)